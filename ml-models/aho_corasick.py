@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Token-level Aho-Corasick automaton for phrase rewriting.
+Patterns are sequences of tokens; one pass over a tokenized query reports every
+occurrence of every pattern, in time linear in the number of tokens plus the
+number of matches regardless of how many patterns are loaded.
+"""
+
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class AhoCorasick:
+    """Goto/failure automaton over token sequences with a payload per pattern."""
+
+    def __init__(self, patterns: Iterable[Tuple[Sequence[str], Any]] = ()):
+        # State 0 is the root; goto[s] maps a token to the next state
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Pattern ending exactly at a state (length, payload), and the nearest
+        # proper suffix state that also ends a pattern
+        self.output: List[Tuple[int, Any]] = [None]
+        self.output_link: List[int] = [0]
+        self.num_patterns = 0
+
+        for tokens, payload in patterns:
+            self._add(tuple(tokens), payload)
+        self._link()
+
+    def __len__(self) -> int:
+        return self.num_patterns
+
+    def _add(self, tokens: Tuple[str, ...], payload: Any):
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            next_state = self.goto[state].get(token)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.output_link.append(0)
+                self.goto[state][token] = next_state
+            state = next_state
+        if self.output[state] is None:
+            self.num_patterns += 1
+        self.output[state] = (len(tokens), payload)
+
+    def _link(self):
+        """Breadth-first computation of failure and output links."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(token, 0)
+                self.fail[child] = target if target != child else 0
+                suffix = self.fail[child]
+                self.output_link[child] = suffix if self.output[suffix] is not None else self.output_link[suffix]
+
+    def find_all(self, tokens: Sequence[str]) -> List[Tuple[int, int, Any]]:
+        """Every pattern occurrence as (start, end, payload), end exclusive."""
+        matches = []
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token, 0)
+            hit = state if self.output[state] is not None else self.output_link[state]
+            while hit:
+                length, payload = self.output[hit]
+                matches.append((i + 1 - length, i + 1, payload))
+                hit = self.output_link[hit]
+        return matches
+
+    def find_longest(self, tokens: Sequence[str],
+                     accept: Optional[Callable[[int, int, Any], bool]] = None) -> List[Tuple[int, int, Any]]:
+        """Leftmost-longest non-overlapping occurrences (optionally filtered by accept), in query order."""
+        selected = []
+        covered = 0
+        for start, end, payload in sorted(self.find_all(tokens), key=lambda m: (m[0], m[0] - m[1])):
+            if start >= covered and (accept is None or accept(start, end, payload)):
+                selected.append((start, end, payload))
+                covered = end
+        return selected
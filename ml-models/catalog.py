@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+Immutable catalog snapshots for the search service.
+A snapshot bundles everything derived from unified_products.json (products,
+embedding matrix, trie, filters, spell vocabulary) so it can be rebuilt in the
+background and swapped in with a single reference assignment.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ecommerce_spell_correction import EcommerceSpellCorrector
+from category_router import CategoryRouter, UNCATEGORIZED
+from multi_vector import MultiVectorIndex
+from ranking import category_key
+from src.radix_trie import RadixTrie
+from substring_index import SubstringIndex
+
+ProgressCallback = Callable[[str, float], None]
+
+# Directory holding the memory-mapped catalog arrays shared by uvicorn workers
+SHARED_CATALOG_ENV = "CATALOG_SHARED_DIR"
+SHARED_ARRAY_NAMES = ("embeddings", "prices", "ratings", "brands", "category_keys", "ids")
+# Multi-vector field store arrays, exported when the field store matches the catalog
+SHARED_FIELD_PREFIX = "field_"
+
+# Base autocomplete weight of category suggestions (above any product title)
+CATEGORY_SUGGESTION_WEIGHT = 1e6
+
+
+def parse_rating(rating_str: str) -> float:
+    """Parse rating string to extract numeric rating."""
+    if not rating_str or rating_str == "No rating available":
+        return 0.0
+
+    try:
+        # Extract numbers from rating string (e.g., "4.2 out of 5" -> 4.2)
+        numbers = re.findall(r'\d+\.?\d*', str(rating_str))
+        if numbers:
+            return float(numbers[0])
+    except:
+        pass
+
+    return 0.0
+
+
+def extract_category_terms(category_str: str) -> List[str]:
+    """Extract category terms from category string."""
+    if not category_str or category_str == 'nan':
+        return []
+
+    try:
+        if category_str.startswith('[') and category_str.endswith(']'):
+            category_clean = category_str[2:-2]  # Remove ["..."]
+            levels = [level.strip().lower() for level in category_clean.split(">>")]
+            return levels
+    except:
+        pass
+
+    return [category_str.lower()]
+
+
+def category_suggestions(category: str) -> List[str]:
+    """Suggestion strings for one category tree: every level and every parent path."""
+    suggestions = []
+    if category and category != 'nan':
+        try:
+            # Remove the outer brackets and quotes, split by '>>' for hierarchy
+            if category.startswith('[') and category.endswith(']'):
+                category_clean = category[2:-2]  # Remove ["..."]
+                levels = [level.strip() for level in category_clean.split(">>")]
+
+                # Add each level and parent paths
+                for i, level in enumerate(levels):
+                    if level and len(level) > 2:
+                        suggestions.append(level)
+                        if i > 0:
+                            parent_path = " >> ".join(levels[:i+1])
+                            suggestions.append(parent_path)
+        except:
+            # Fallback: add the raw category
+            if len(category) > 2:
+                suggestions.append(category)
+    return suggestions
+
+
+def build_suggestion_bank(products: List[Dict]) -> List[str]:
+    """Build the sorted category suggestion bank from the category trees."""
+    categories_set = set()
+    for p in products:
+        categories_set.update(category_suggestions(p.get("category", "")))
+    return sorted(list(categories_set))
+
+
+def build_suggestion_weights(products: List[Dict]) -> Dict[str, float]:
+    """
+    Autocomplete weight per title and category suggestion. Titles weigh how many
+    products share them (rating breaks ties); categories weigh the number of
+    products under them plus CATEGORY_SUGGESTION_WEIGHT, so they rank above titles.
+    """
+    weights = {}
+    category_counts = {}
+    for p in products:
+        title = p.get("title", "").strip()
+        if title:
+            weights[title] = weights.get(title, 0.0) + 1.0 + parse_rating(p.get("rating")) / 10
+        for suggestion in set(category_suggestions(p.get("category", ""))):
+            category_counts[suggestion] = category_counts.get(suggestion, 0) + 1
+    for suggestion, count in category_counts.items():
+        weights[suggestion] = CATEGORY_SUGGESTION_WEIGHT + count
+    return weights
+
+
+def build_dynamic_filters(products: List[Dict]) -> Dict:
+    """Generate dynamic filter options based on actual product data."""
+    if not products:
+        return {"brands": [], "categories": [], "price_range": {"min": 0, "max": 5000}}
+
+    # Extract unique brands
+    brands = set()
+    categories = set()
+    prices = []
+
+    for product in products:
+        # Brands
+        brand = product.get("brand", "").strip()
+        if brand and brand.lower() not in ['', 'nan', 'none']:
+            brands.add(brand)
+
+        # Categories
+        category_terms = extract_category_terms(product.get("category", ""))
+        for term in category_terms:
+            if len(term.strip()) > 2:
+                categories.add(term.strip().title())
+
+        # Prices
+        price = product.get("discounted_price", 0.0) or product.get("retail_price", 0.0)
+        if price > 0:
+            prices.append(price)
+
+    # Calculate price range
+    min_price = int(min(prices)) if prices else 0
+    max_price = int(max(prices)) if prices else 5000
+
+    return {
+        "brands": sorted(list(brands))[:20],  # Top 20 brands
+        "categories": sorted(list(categories))[:15],  # Top 15 categories
+        "price_range": {
+            "min": min_price,
+            "max": max_price
+        }
+    }
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product equals cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def catalog_fingerprint(products_file: str) -> str:
+    """Content hash of the products file, used to detect stale derived artifacts."""
+    digest = hashlib.sha1()
+    with open(products_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def default_shared_dir() -> str:
+    """Prefer tmpfs (POSIX shared memory) so the arrays never touch the disk."""
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm/searchoptimizer-catalog"
+    return os.path.abspath(".catalog_shared")
+
+
+def _catalog_arrays(products: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Pull the read-only numeric columns out of the product dicts.
+    The per-product embedding lists are removed from the dicts as they are packed.
+    """
+    embedding_lists = [p.pop("embedding", None) for p in products]
+    dim = next((len(e) for e in embedding_lists if e), 0)
+    embeddings = np.zeros((len(products), dim), dtype=np.float32)
+    for i, emb in enumerate(embedding_lists):
+        if emb:
+            embeddings[i] = emb
+    del embedding_lists
+
+    prices = np.array([
+        p.get("discounted_price", 0.0) if p.get("discounted_price", 0.0) > 0 else p.get("retail_price", 0.0)
+        for p in products
+    ], dtype=np.float64)
+    ratings = np.array([parse_rating(p.get("rating", "")) for p in products], dtype=np.float64)
+    brands = np.array([p.get("brand", "").lower() for p in products], dtype=str)
+    category_keys = np.array([category_key(extract_category_terms(p.get("category", "")))
+                              for p in products], dtype=str)
+    ids = np.array([str(p.get("id", "")) for p in products], dtype=str)
+
+    return {
+        "embeddings": normalize_rows(embeddings).astype(np.float32),
+        "prices": prices,
+        "ratings": ratings,
+        "brands": brands,
+        "category_keys": category_keys,
+        "ids": ids,
+    }
+
+
+def export_shared_catalog(products_file: str, shared_dir: str) -> str:
+    """
+    Write the catalog arrays as .npy files that workers can memory-map.
+
+    Each export lives in a subdirectory named after the catalog fingerprint and is
+    published with an atomic rename, so concurrent workers either see a complete
+    export or none at all.
+
+    Args:
+        products_file: Path to unified_products.json
+        shared_dir: Parent directory (ideally on /dev/shm)
+
+    Returns:
+        Path of the directory holding the exported arrays
+    """
+    fingerprint = catalog_fingerprint(products_file)
+    target = os.path.join(shared_dir, fingerprint)
+    if os.path.exists(os.path.join(target, "manifest.json")):
+        return target
+
+    os.makedirs(shared_dir, exist_ok=True)
+    tmp_dir = os.path.join(shared_dir, f".{fingerprint}.{os.getpid()}.tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    with open(products_file, "r", encoding='utf-8') as f:
+        products = json.load(f)
+    arrays = _catalog_arrays(products)
+    for name in SHARED_ARRAY_NAMES:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), arrays[name])
+    # Field embeddings stay float16 and are mapped like the other arrays
+    fields_file = field_store_path(products_file)
+    fields_signature = _file_signature(fields_file)
+    field_index = MultiVectorIndex.load(fields_file, ids=arrays["ids"]) if fields_signature else None
+    if field_index is not None:
+        for name, array in field_index.to_arrays(SHARED_FIELD_PREFIX).items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+    else:
+        fields_signature = None
+    # Product metadata without embeddings: much cheaper for each worker to parse
+    with open(os.path.join(tmp_dir, "products_meta.json"), "w", encoding='utf-8') as f:
+        json.dump(products, f, ensure_ascii=False)
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding='utf-8') as f:
+        json.dump({
+            "fingerprint": fingerprint,
+            "source": os.path.abspath(products_file),
+            "num_products": len(products),
+            "embedding_dim": int(arrays["embeddings"].shape[1]),
+            "fields_signature": fields_signature,
+            "created_at": datetime.now().isoformat(),
+        }, f)
+
+    try:
+        os.rename(tmp_dir, target)
+    except OSError:
+        # Another process published the same fingerprint first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    prune_shared_catalogs(shared_dir, keep=fingerprint)
+    print(f"✅ Exported shared catalog arrays for {len(products)} products to {target}")
+    return target
+
+
+def _users_dir(export_path: str) -> str:
+    """Per-export directory of pid marker files, one per process that has the export mapped."""
+    shared_dir, fingerprint = os.path.split(os.path.normpath(export_path))
+    return os.path.join(shared_dir, ".users", fingerprint)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def release_shared_catalog(export_path: str):
+    """Record that this process no longer maps the export, so it may be pruned."""
+    try:
+        os.remove(os.path.join(_users_dir(export_path), str(os.getpid())))
+    except OSError:
+        pass
+
+
+def prune_shared_catalogs(shared_dir: str, keep: str):
+    """
+    Delete exports of other catalogs that no live process still has attached.
+    Exports in use by another worker stay until that worker switches and releases them.
+
+    Args:
+        shared_dir: Parent directory of the exports
+        keep: Fingerprint of the export that must survive
+    """
+    users_root = os.path.join(shared_dir, ".users")
+    for entry in os.listdir(shared_dir):
+        if entry == keep or entry.startswith("."):
+            continue
+        users = os.path.join(users_root, entry)
+        pids = [int(name) for name in os.listdir(users) if name.isdigit()] if os.path.isdir(users) else []
+        if any(_pid_alive(pid) for pid in pids):
+            continue
+        shutil.rmtree(os.path.join(shared_dir, entry), ignore_errors=True)
+        shutil.rmtree(users, ignore_errors=True)
+
+
+def attach_shared_catalog(products_file: str, shared_dir: str) -> Optional[Dict[str, Any]]:
+    """Memory-map an existing export matching the products file, or return None."""
+    target = os.path.join(shared_dir, catalog_fingerprint(products_file))
+    # Register before mapping so a concurrent prune in another worker leaves the export alone
+    users = _users_dir(target)
+    os.makedirs(users, exist_ok=True)
+    open(os.path.join(users, str(os.getpid())), "w").close()
+    if not os.path.exists(os.path.join(target, "manifest.json")):
+        release_shared_catalog(target)
+        return None
+
+    attached = {name: np.load(os.path.join(target, f"{name}.npy"), mmap_mode="r")
+                for name in SHARED_ARRAY_NAMES}
+    with open(os.path.join(target, "manifest.json"), "r", encoding='utf-8') as f:
+        manifest = json.load(f)
+    fields_signature = manifest.get("fields_signature")
+    if fields_signature is not None and fields_signature == _file_signature(field_store_path(products_file)):
+        field_arrays = {name: np.load(os.path.join(target, f"{name}.npy"), mmap_mode="r")
+                        for name in MultiVectorIndex.array_names(SHARED_FIELD_PREFIX)}
+        attached["field_index"] = MultiVectorIndex.from_arrays(field_arrays, SHARED_FIELD_PREFIX)
+    with open(os.path.join(target, "products_meta.json"), "r", encoding='utf-8') as f:
+        attached["products"] = json.load(f)
+    attached["path"] = target
+    return attached
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of the product catalog and every structure derived from it.
+    Request handlers grab the current snapshot once and use only that object,
+    so a concurrent reload can never expose a half-built catalog.
+    """
+
+    def __init__(self,
+                 products: List[Dict],
+                 embeddings: np.ndarray,
+                 suggestion_bank: List[str],
+                 trie: RadixTrie,
+                 filters: Dict,
+                 spell_corrector: Optional[EcommerceSpellCorrector],
+                 version: int = 0,
+                 source: str = "",
+                 fingerprint: str = "",
+                 prices: Optional[np.ndarray] = None,
+                 ratings: Optional[np.ndarray] = None,
+                 brands: Optional[np.ndarray] = None,
+                 category_keys: Optional[np.ndarray] = None,
+                 ids: Optional[np.ndarray] = None,
+                 shared: bool = False,
+                 shared_path: Optional[str] = None,
+                 router: Optional[CategoryRouter] = None,
+                 field_index: Optional[MultiVectorIndex] = None,
+                 suggestion_index: Optional[SubstringIndex] = None):
+        self.products = products
+        self.embeddings = embeddings
+        self.prices = prices if prices is not None else np.zeros(0, dtype=np.float64)
+        self.ratings = ratings if ratings is not None else np.zeros(0, dtype=np.float64)
+        self.brands = brands if brands is not None else np.zeros(0, dtype=str)
+        self.category_keys = category_keys if category_keys is not None else np.zeros(0, dtype=str)
+        self.ids = ids if ids is not None else np.zeros(0, dtype=str)
+        self.shared = shared
+        self.shared_path = shared_path
+        self.router = router
+        self.field_index = field_index
+        # Optional ShardedSearcher serving this snapshot's export (attached by the API)
+        self.sharded_searcher = None
+        self.suggestion_bank = suggestion_bank
+        # Substring lookups over the suggestion bank for /search
+        self.suggestion_index = suggestion_index if suggestion_index is not None else SubstringIndex(suggestion_bank)
+        self.trie = trie
+        self.filters = filters
+        self.spell_corrector = spell_corrector
+        self.version = version
+        self.source = source
+        # Content hash of the products file; keys artifacts derived from this catalog
+        self.fingerprint = fingerprint
+        self.built_at = datetime.now().isoformat()
+
+    @classmethod
+    def empty(cls, spell_corrector: Optional[EcommerceSpellCorrector] = None,
+              version: int = 0) -> "CatalogSnapshot":
+        """Snapshot used before the catalog is loaded or when it is missing."""
+        return cls(
+            products=[],
+            embeddings=np.zeros((0, 0), dtype=np.float32),
+            suggestion_bank=[],
+            trie=RadixTrie(),
+            filters=build_dynamic_filters([]),
+            spell_corrector=spell_corrector,
+            version=version,
+        )
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    @staticmethod
+    def normalize_query(query_embedding: np.ndarray) -> np.ndarray:
+        """Flatten and L2-normalize a query embedding."""
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        return query
+
+    def score(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a single query embedding against every product."""
+        return self.embeddings @ self.normalize_query(query_embedding)
+
+
+def field_store_path(products_file: str) -> str:
+    """Per-field embeddings written by generate_unified_products.py --multi-vector."""
+    return os.path.splitext(products_file)[0] + "_fields.npz"
+
+
+def _file_signature(path: str) -> Optional[List[int]]:
+    """Size and mtime of a file, to tell whether an export still reflects it."""
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def autocomplete_index_path(products_file: str) -> str:
+    """Serialized autocomplete index lives next to the products file."""
+    return os.path.splitext(products_file)[0] + "_autocomplete.idx"
+
+
+def build_autocomplete_index(products: List[Dict], suggestion_bank: List[str]) -> RadixTrie:
+    """Radix trie over product titles and category suggestions, weighted for ranking."""
+    trie = RadixTrie()
+    suggestion_weights = build_suggestion_weights(products)
+    for p in products:
+        title = p.get("title", "").strip()
+        if title:
+            trie.insert(title, suggestion_weights[title])
+    for suggestion in suggestion_bank:
+        trie.insert(suggestion, suggestion_weights[suggestion])
+    trie.build()
+    return trie
+
+
+def prepare_autocomplete_index(products_file: str,
+                               products: Optional[List[Dict]] = None,
+                               suggestion_bank: Optional[List[str]] = None,
+                               fingerprint: Optional[str] = None,
+                               force: bool = False) -> RadixTrie:
+    """
+    Memory-map the saved autocomplete index if it matches the catalog, otherwise
+    build it, save it and map the saved file.
+
+    Args:
+        products_file: Path to unified_products.json
+        products: Already loaded products (read from products_file if None)
+        suggestion_bank: Already built suggestion bank (built from products if None)
+        fingerprint: Catalog content hash (computed from products_file if None)
+        force: Rebuild even if a matching index exists
+
+    Returns:
+        The autocomplete RadixTrie (in memory if the index file couldn't be written)
+    """
+    fingerprint = fingerprint or catalog_fingerprint(products_file)
+    path = autocomplete_index_path(products_file)
+    if not force:
+        trie = RadixTrie.load(path, fingerprint)
+        if trie is not None:
+            print(f"✅ Mapped autocomplete index {path}")
+            return trie
+
+    if products is None:
+        with open(products_file, "r", encoding='utf-8') as f:
+            products = json.load(f)
+    if suggestion_bank is None:
+        suggestion_bank = build_suggestion_bank(products)
+    trie = build_autocomplete_index(products, suggestion_bank)
+    try:
+        trie.save(path, fingerprint)
+    except OSError as e:
+        print(f"⚠️ Could not save autocomplete index {path}: {e}")
+        return trie
+    print(f"✅ Saved autocomplete index to {path}")
+    return RadixTrie.load(path, fingerprint) or trie
+
+
+def build_catalog_snapshot(products_file: str = "unified_products.json",
+                           semantic_model=None,
+                           version: int = 0,
+                           progress: Optional[ProgressCallback] = None,
+                           shared_dir: Optional[str] = None) -> CatalogSnapshot:
+    """
+    Build a complete catalog snapshot from the products file.
+
+    Args:
+        products_file: Path to unified_products.json
+        semantic_model: Shared SentenceTransformer for the spell corrector
+        version: Version number stamped on the snapshot
+        progress: Optional callback receiving (stage, fraction_done)
+        shared_dir: If set, attach to (or first export) memory-mapped catalog arrays there
+
+    Returns:
+        A fully built CatalogSnapshot (raises FileNotFoundError if the file is missing)
+    """
+    def report(stage: str, fraction: float):
+        if progress is not None:
+            progress(stage, fraction)
+
+    arrays = None
+    shared_path = None
+    if shared_dir:
+        report("attaching shared catalog", 0.0)
+        try:
+            arrays = attach_shared_catalog(products_file, shared_dir)
+            if arrays is None:
+                export_shared_catalog(products_file, shared_dir)
+                arrays = attach_shared_catalog(products_file, shared_dir)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not attach shared catalog in {shared_dir}: {e}")
+            release_shared_catalog(os.path.join(shared_dir, catalog_fingerprint(products_file)))
+            arrays = None
+        if arrays is None:
+            # e.g. the export was pruned between exporting and attaching
+            print("⚠️ Shared catalog unavailable, loading catalog arrays in-process")
+        else:
+            shared_path = arrays.pop("path")
+
+    if arrays is not None:
+        products = arrays.pop("products")
+    else:
+        report("loading products", 0.0)
+        with open(products_file, "r", encoding='utf-8') as f:
+            products = json.load(f)
+
+        # Pack embeddings into one normalized matrix and drop the per-product lists
+        report("building embedding matrix", 0.2)
+        arrays = _catalog_arrays(products)
+
+    report("building suggestion bank", 0.4)
+    suggestion_bank = build_suggestion_bank(products)
+    fingerprint = catalog_fingerprint(products_file)
+
+    # --- Map the autocomplete index with product titles and all suggestion bank values ---
+    report("loading autocomplete index", 0.5)
+    trie = prepare_autocomplete_index(products_file, products, suggestion_bank, fingerprint)
+
+    report("building category router", 0.6)
+    top_categories = []
+    for p in products:
+        terms = extract_category_terms(p.get("category", ""))
+        top_categories.append(terms[0] if terms and terms[0] else UNCATEGORIZED)
+    router = CategoryRouter(arrays["embeddings"], top_categories)
+
+    # Optional per-field embeddings written by generate_unified_products.py --multi-vector,
+    # mapped from the shared export when it holds the current field store
+    field_index = arrays.pop("field_index", None)
+    fields_file = field_store_path(products_file)
+    if field_index is None and os.path.exists(fields_file):
+        report("loading field embeddings", 0.65)
+        field_index = MultiVectorIndex.load(fields_file, ids=arrays["ids"])
+
+    report("building filters", 0.7)
+    filters = build_dynamic_filters(products)
+
+    report("building spell vocabulary", 0.8)
+    spell_corrector = EcommerceSpellCorrector(products_file, products=products,
+                                              semantic_model=semantic_model, fingerprint=fingerprint)
+
+    report("done", 1.0)
+    print(f"✅ Loaded {len(products)} unified products for search")
+    print(f"✅ Built {len(suggestion_bank)} category suggestions")
+    print(f"✅ Autocomplete index holds {len(trie)} titles and category suggestions")
+
+    return CatalogSnapshot(
+        products=products,
+        embeddings=arrays["embeddings"],
+        suggestion_bank=suggestion_bank,
+        trie=trie,
+        filters=filters,
+        spell_corrector=spell_corrector,
+        version=version,
+        source=os.path.abspath(products_file),
+        fingerprint=fingerprint,
+        prices=arrays["prices"],
+        ratings=arrays["ratings"],
+        brands=arrays["brands"],
+        category_keys=arrays["category_keys"],
+        ids=arrays["ids"],
+        shared=shared_path is not None,
+        shared_path=shared_path,
+        router=router,
+        field_index=field_index,
+    )
+
+
+class CatalogReloader:
+    """
+    Builds a new snapshot on a background thread and publishes it atomically.
+    Only one reload runs at a time; status() reports progress of the latest one.
+    """
+
+    def __init__(self, on_ready: Callable[[CatalogSnapshot], None]):
+        self.on_ready = on_ready
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {
+            "state": "idle",
+            "stage": None,
+            "progress": 0.0,
+            "started_at": None,
+            "finished_at": None,
+            "duration_seconds": None,
+            "version": None,
+            "error": None,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._status)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, products_file: str, semantic_model=None, version: int = 0,
+              shared_dir: Optional[str] = None) -> bool:
+        """Start a reload; returns False if one is already in progress."""
+        with self._lock:
+            if self.is_running():
+                return False
+            self._status.update({
+                "state": "running",
+                "stage": "queued",
+                "progress": 0.0,
+                "started_at": datetime.now().isoformat(),
+                "finished_at": None,
+                "duration_seconds": None,
+                "version": version,
+                "error": None,
+            })
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(products_file, semantic_model, version, shared_dir),
+                name="catalog-reload",
+                daemon=True,
+            )
+            self._thread.start()
+        return True
+
+    def _progress(self, stage: str, fraction: float):
+        with self._lock:
+            self._status["stage"] = stage
+            self._status["progress"] = round(fraction, 3)
+
+    def _run(self, products_file: str, semantic_model, version: int, shared_dir: Optional[str]):
+        start = time.time()
+        try:
+            snapshot = build_catalog_snapshot(products_file, semantic_model=semantic_model,
+                                              version=version, progress=self._progress,
+                                              shared_dir=shared_dir)
+            self.on_ready(snapshot)
+            state, error = "succeeded", None
+        except Exception as e:
+            print(f"❌ Catalog reload failed: {e}")
+            state, error = "failed", str(e)
+        with self._lock:
+            self._status.update({
+                "state": state,
+                "error": error,
+                "finished_at": datetime.now().isoformat(),
+                "duration_seconds": round(time.time() - start, 3),
+            })
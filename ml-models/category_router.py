@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Category-routed retrieval.
+Products are grouped by top-level category and each group gets a normalized
+embedding centroid. A query is compared to the centroids first and only the
+closest partitions are scored; when the routing decision is not clear-cut the
+caller falls back to a full scan.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+UNCATEGORIZED = "uncategorized"
+
+# Rows gathered at a time while summing partition centroids
+CENTROID_CHUNK_ROWS = 8192
+
+
+class CategoryRouter:
+    """
+    Per-top-level-category partitions of the catalog with embedding centroids.
+    Only the row order and partition offsets are stored; the embedding matrix is
+    the snapshot's own (possibly shared, memory-mapped) array, so the router adds
+    no per-worker copy of it. A routed query gathers just the probed partitions.
+    """
+
+    def __init__(self,
+                 embeddings: np.ndarray,
+                 top_categories: List[str],
+                 max_partitions: int = 3,
+                 min_similarity: float = 0.25,
+                 min_margin: float = 0.05):
+        """
+        Build partitions and centroids.
+
+        Args:
+            embeddings: Normalized product embedding matrix (catalog order)
+            top_categories: Top-level category name for each product
+            max_partitions: Number of partitions scored for a routed query
+            min_similarity: Best centroid similarity required to route at all
+            min_margin: Required gap between the last selected and first skipped partition
+        """
+        self.max_partitions = max_partitions
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.num_products = len(top_categories)
+
+        names = sorted(set(top_categories))
+        name_to_id = {name: i for i, name in enumerate(names)}
+        partition_ids = np.array([name_to_id[c] for c in top_categories], dtype=np.int32)
+
+        # Stable sort keeps catalog order inside each partition
+        self.order = np.argsort(partition_ids, kind="stable").astype(np.int64)
+        self.embeddings = embeddings
+        counts = np.bincount(partition_ids, minlength=len(names))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.names = names
+
+        # Summed in bounded chunks so no full reordered copy of the matrix is made
+        dim = embeddings.shape[1] if embeddings.ndim == 2 else 0
+        centroids = np.zeros((len(names), dim), dtype=np.float64)
+        for p in range(len(names)):
+            for lo in range(int(self.offsets[p]), int(self.offsets[p + 1]), CENTROID_CHUNK_ROWS):
+                hi = min(lo + CENTROID_CHUNK_ROWS, int(self.offsets[p + 1]))
+                centroids[p] += embeddings[self.order[lo:hi]].sum(axis=0)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.centroids = (centroids / norms).astype(np.float32)
+
+    def route(self, query_embedding: np.ndarray, max_partitions: Optional[int] = None,
+              force: bool = False) -> Dict:
+        """
+        Decide which partitions to score for a normalized query embedding.
+        With force=True the closest partitions are used even when confidence is low
+        (used when the request's latency budget can't cover a full scan).
+
+        Returns:
+            Dict with 'routed' (False means full scan), selected partition ids and names,
+            centroid similarities and the fraction of the catalog skipped
+        """
+        max_partitions = max_partitions or self.max_partitions
+        decision = {"routed": False, "partitions": [], "partition_ids": [],
+                    "catalog_fraction_skipped": 0.0, "reason": None}
+        if len(self.names) <= max_partitions:
+            decision["reason"] = "too few partitions"
+            return decision
+
+        similarities = self.centroids @ query_embedding
+        ranked = np.argsort(-similarities, kind="stable")
+        selected = ranked[:max_partitions]
+        best = float(similarities[ranked[0]])
+        margin = float(similarities[selected[-1]] - similarities[ranked[max_partitions]])
+        decision["best_similarity"] = round(best, 4)
+        decision["margin"] = round(margin, 4)
+
+        if not force and best < self.min_similarity:
+            decision["reason"] = "low centroid similarity"
+            return decision
+        if not force and margin < self.min_margin:
+            decision["reason"] = "ambiguous partitions"
+            return decision
+
+        scored = int(sum(self.offsets[p + 1] - self.offsets[p] for p in selected))
+        decision.update({
+            "routed": True,
+            "partitions": [self.names[p] for p in selected],
+            "partition_ids": [int(p) for p in selected],
+            "catalog_fraction_skipped": round(1 - scored / max(self.num_products, 1), 4),
+            "reason": "forced" if force else "confident",
+        })
+        return decision
+
+    def score(self, query_embedding: np.ndarray, partition_ids: List[int]):
+        """Scores and catalog indices for the products of the given partitions (index order)."""
+        partition_ids = sorted(partition_ids)
+        indices = np.concatenate([self.order[self.offsets[p]:self.offsets[p + 1]] for p in partition_ids])
+        # Gathers only the probed rows; the copy lives for this request alone
+        scores = self.embeddings[indices] @ query_embedding
+        return scores, indices
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Per-request latency budgets.
+A Deadline is created from the request's `timeout_ms` (query parameter, body field
+or X-Timeout-Ms header) and passed down the search pipeline. Optional stages ask it
+whether they can still afford to run, based on a moving average of how long that
+stage has recently taken, and the skipped stages are reported in the response.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+TIMEOUT_HEADER = "x-timeout-ms"
+
+# Initial per-stage costs (ms), measured on a few thousand products on CPU and kept
+# on the low side: a skipped stage is never measured, so an overestimate would stick
+# and silently drop work that fits, while an underestimate is corrected by the first
+# request that runs the stage
+DEFAULT_STAGE_ESTIMATES_MS = {
+    "spell_correction": 0.5,
+    "spell_semantic_candidates": 0.5,
+    "suggestions": 0.05,
+    "query_encoding": 5.0,
+    "full_scan": 1.0,
+    "multi_vector_scoring": 3.0,
+}
+
+
+class StageLatencies:
+    """Exponentially weighted moving average of observed stage latencies."""
+
+    def __init__(self, estimates: Dict[str, float], alpha: float = 0.2):
+        self.alpha = alpha
+        self._estimates = dict(estimates)
+        self._lock = threading.Lock()
+
+    def estimate(self, stage: str) -> float:
+        return self._estimates.get(stage, 0.0)
+
+    def observe(self, stage: str, elapsed_ms: float):
+        with self._lock:
+            previous = self._estimates.get(stage)
+            if previous is None:
+                self._estimates[stage] = elapsed_ms
+            else:
+                self._estimates[stage] = (1 - self.alpha) * previous + self.alpha * elapsed_ms
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(ms, 3) for stage, ms in self._estimates.items()}
+
+
+stage_latencies = StageLatencies(DEFAULT_STAGE_ESTIMATES_MS)
+
+
+class Deadline:
+    """Latency budget for one request (budget_ms=None means unbounded)."""
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self.started = time.perf_counter()
+        self.skipped: List[str] = []
+        self.served_from_cache = False
+
+    @classmethod
+    def from_request(cls, timeout_ms: Optional[Any], headers=None) -> "Deadline":
+        """
+        Build from an explicit timeout, falling back to the X-Timeout-Ms header.
+        Values that are not positive finite numbers (e.g. a JSON body's "fast")
+        are ignored, leaving the request unbounded.
+        """
+        if timeout_ms is None and headers is not None:
+            timeout_ms = headers.get(TIMEOUT_HEADER) or None
+        if timeout_ms is not None:
+            try:
+                timeout_ms = float(timeout_ms)
+            except (TypeError, ValueError):
+                timeout_ms = None
+        if timeout_ms is not None and not (0 < timeout_ms < float("inf")):
+            timeout_ms = None
+        return cls(timeout_ms)
+
+    @property
+    def bounded(self) -> bool:
+        return self.budget_ms is not None
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def remaining_ms(self) -> float:
+        if self.budget_ms is None:
+            return float("inf")
+        return self.budget_ms - self.elapsed_ms()
+
+    def can_afford(self, *stages: str) -> bool:
+        """True if the estimated cost of the given stages fits in the remaining budget."""
+        if self.budget_ms is None:
+            return True
+        return sum(stage_latencies.estimate(s) for s in stages) <= self.remaining_ms()
+
+    def skip(self, stage: str):
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+
+    @contextmanager
+    def track(self, stage: str):
+        """Time a stage and feed the measurement back into the estimates."""
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            stage_latencies.observe(stage, (time.perf_counter() - began) * 1000)
+
+    def report(self) -> Dict:
+        return {
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round(self.elapsed_ms(), 3),
+            "skipped_stages": list(self.skipped),
+            "served_from_cache": self.served_from_cache,
+        }
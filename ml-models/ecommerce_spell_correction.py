@@ -7,14 +7,118 @@ Combines multiple approaches for high-accuracy spell correction in e-commerce co
 import json
 import re
 import os
+import threading
+import time
 from typing import List, Dict, Tuple, Optional, Set
 from collections import Counter, defaultdict
 import difflib
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import Levenshtein
 
+from aho_corasick import AhoCorasick
+from lru_cache import LRUCache
+from ngram_lm import HashedNgramModel
+from symmetric_delete import SymmetricDeleteIndex, vocabulary_hash
+from word_segmentation import WordSegmenter
+
+# Fast first tier: the SymSpell instance over custom_dictionary.txt
+try:
+    from symspellpy import Verbosity
+    from spell_correction import sym_spell as default_symspell
+except Exception as e:
+    print(f"⚠️ SymSpell tier not available: {e}")
+    default_symspell = None
+
+# Simple phonetic rules for common e-commerce terms, applied in order
+PHONETIC_RULES = [
+    ('ph', 'f'), ('ck', 'k'), ('c', 'k'), ('z', 's'),
+    ('i', 'y'), ('ei', 'ai'), ('ou', 'ow'), ('tion', 'shun')
+]
+
+
+# Brand/product terms embedded for semantic candidates (most frequent first)
+MAX_PRIORITY_VOCAB = 1000
+
+# Bounds of the per-corrector correction caches
+WORD_CACHE_SIZE = 16384
+QUERY_CACHE_SIZE = 4096
+
+# Bumped whenever the layout of the saved spell artifact changes
+ARTIFACT_FORMAT = 3
+
+# Word role flags stored in the artifact
+FLAG_BRAND = 1
+FLAG_PRODUCT = 2
+FLAG_CATEGORY = 4
+
+# How strongly n-gram context re-weights edit-distance candidates
+CONTEXT_WEIGHT = 1.0
+
+# A SymSpell suggestion must be this many times more frequent than the runner-up to be trusted
+SYMSPELL_DOMINANCE = 5
+
+# Abbreviation expansions and typo/phrase rewrites (typos are keyed by the correct form)
+REWRITES_FILE = os.path.join(os.path.dirname(__file__), "spell_rewrites.json")
+
+# Run-together tokens shorter than this are left to the per-word corrector
+MIN_SEGMENT_LENGTH = 6
+
+_MISSING = object()
+
+
+class TierStats:
+    """Counts and latency of the correction tier that resolved each word or query."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._elapsed_ms = defaultdict(float)
+    
+    def record(self, tier: str, elapsed_ms: float):
+        with self._lock:
+            self._counts[tier] += 1
+            self._elapsed_ms[tier] += elapsed_ms
+    
+    def count(self, tier: str) -> int:
+        return self._counts[tier]
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                tier: {
+                    "count": count,
+                    "hit_rate": round(count / total, 4),
+                    "mean_ms": round(self._elapsed_ms[tier] / count, 4),
+                }
+                for tier, count in self._counts.items()
+            }
+
+
+def tokenize_text(text: str) -> List[str]:
+    """Tokenize text into words, handling e-commerce specific cases."""
+    if not text or text == 'nan':
+        return []
+    
+    # Remove special characters but keep alphanumeric and spaces
+    text = re.sub(r'[^\w\s-]', ' ', text)
+    
+    # Split on whitespace and hyphens
+    words = re.split(r'[\s\-_]+', text.lower())
+    
+    # Filter out empty strings and very short words
+    words = [w.strip() for w in words if w.strip() and len(w.strip()) > 1]
+    
+    return words
+
+
+def phonetic_key(word: str) -> str:
+    """Apply the phonetic rewrite rules to a lowercase word."""
+    for old, new in PHONETIC_RULES:
+        word = word.replace(old, new)
+    return word
+
 
 class EcommerceSpellCorrector:
     """
@@ -22,79 +126,79 @@ class EcommerceSpellCorrector:
     Combines statistical, phonetic, semantic, and domain-specific approaches.
     """
     
-    def __init__(self, products_file: str = "unified_products.json"):
+    def __init__(self, products_file: str = "unified_products.json",
+                 products: Optional[List[Dict]] = None, semantic_model=None,
+                 fingerprint: Optional[str] = None, symspell=_MISSING,
+                 rewrites_file: str = REWRITES_FILE):
         self.products_file = products_file
+        self._products = products
+        # Catalog content hash the saved artifact is keyed by (computed from the file if not given)
+        self.fingerprint = fingerprint
         self.vocabulary = set()
         self.brand_names = set()
         self.product_names = set()
         self.category_terms = set()
         self.word_frequencies = Counter()
-        self.bigrams = Counter()
-        self.trigrams = Counter()
-        
-        # Common e-commerce abbreviations and expansions
-        self.ecommerce_expansions = {
-            'tv': 'television',
-            'pc': 'computer',
-            'mob': 'mobile',
-            'tab': 'tablet',
-            'cam': 'camera',
-            'mic': 'microphone',
-            'kbd': 'keyboard',
-            'hdd': 'hard drive',
-            'ssd': 'solid state drive',
-            'ram': 'memory',
-            'gpu': 'graphics card',
-            'cpu': 'processor',
-            'usb': 'universal serial bus',
-            'hdmi': 'high definition multimedia interface',
-            'wifi': 'wireless',
-            'bt': 'bluetooth',
-            'ac': 'air conditioner',
-            'fridge': 'refrigerator',
-            'washing': 'washing machine',
-            'tshirt': 't-shirt',
-            'jeans': 'denim',
-            'sneakers': 'sports shoes',
-            'earphones': 'headphones'
-        }
-        
-        # Common e-commerce typos and corrections
-        self.common_typos = {
-            'iphone': ['iphone', 'ipone', 'iphon', 'ifone', 'iphones'],
-            'samsung': ['samsung', 'samsnug', 'samsng', 'samung', 'samsong'],
-            'adidas': ['adidas', 'addidas', 'adiadas', 'adidass'],
-            'nike': ['nike', 'niike', 'nkie', 'nyke'],
-            'laptop': ['laptop', 'laptpo', 'labtop', 'leptop'],
-            'mobile': ['mobile', 'mobil', 'moble', 'moblie'],
-            'headphones': ['headphones', 'hedphones', 'headfones', 'headphons'],
-            'bluetooth': ['bluetooth', 'bluetoth', 'bluethooth', 'blutooth'],
-            'wireless': ['wireless', 'wireles', 'wirelss', 'wirelees'],
-            'camera': ['camera', 'camra', 'cemera', 'camara']
-        }
+        # Hashed n-gram counts over titles (and logged queries) for context re-ranking
+        self.ngram_model = None
+        # Symmetric-delete index over the vocabulary for edit-distance candidates
+        self.edit_index = None
+        # Phonetic key -> vocabulary words, plus a distance-1 index over the keys
+        self.phonetic_words = {}
+        self.phonetic_index = None
+        # Normalized embeddings of the priority vocabulary for semantic candidates
+        self.priority_vocab = []
+        self.priority_embeddings = None
+        self._priority_vocab_hash = None
+        # Vocabulary trie for splitting run-together tokens ("menstshirt" -> "mens tshirt")
+        self.segmenter = None
+        # Token-level (word, context) -> correction and query-level result caches
+        self.word_cache = LRUCache(WORD_CACHE_SIZE)
+        self.query_cache = LRUCache(QUERY_CACHE_SIZE)
+        # SymSpell answers first; the full candidate pipeline runs only when it isn't confident
+        self.symspell = default_symspell if symspell is _MISSING else symspell
+        self.word_tiers = TierStats()
+        self.query_tiers = TierStats()
+        
+        # Common e-commerce abbreviations/expansions and typos, rewritten in one pass per query
+        self.rewrites_file = rewrites_file
+        self.ecommerce_expansions = {}
+        self.common_typos = {}
+        self.rewriter = None
+        self._load_rewrites()
         
         # Initialize semantic model for context-aware corrections
         try:
-            self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.semantic_model = semantic_model or SentenceTransformer('all-MiniLM-L6-v2')
             self.semantic_enabled = True
         except:
             self.semantic_enabled = False
             print("⚠️ Semantic model not available, using statistical methods only")
             
-        self._load_vocabulary()
+        if not self._load_artifact():
+            self._load_vocabulary()
+            self._build_edit_index()
+            self._build_phonetic_index()
+            self._save_artifact()
+        self._build_segmenter()
+        self._build_priority_embeddings()
         self._build_correction_maps()
+        self._products = None  # Vocabulary is built, don't keep the catalog alive
     
     def _load_vocabulary(self):
         """Load vocabulary from product data and build frequency maps."""
-        if not os.path.exists(self.products_file):
+        if self._products is not None:
+            products = self._products
+        elif not os.path.exists(self.products_file):
             print(f"⚠️ Products file {self.products_file} not found")
             return
-            
-        with open(self.products_file, 'r', encoding='utf-8') as f:
-            products = json.load(f)
+        else:
+            with open(self.products_file, 'r', encoding='utf-8') as f:
+                products = json.load(f)
         
         print(f"📚 Building vocabulary from {len(products)} products...")
         
+        title_sentences = []
         for product in products:
             # Extract and clean text
             title = product.get('title', '').lower()
@@ -104,6 +208,7 @@ class EcommerceSpellCorrector:
             
             # Process title
             title_words = self._tokenize(title)
+            title_sentences.append(title_words)
             for word in title_words:
                 if len(word) > 2:
                     self.vocabulary.add(word)
@@ -136,7 +241,7 @@ class EcommerceSpellCorrector:
                     self.word_frequencies[word] += 1
         
         # Build n-grams for context-aware correction
-        self._build_ngrams()
+        self._build_ngram_model(title_sentences)
         
         print(f"✅ Built vocabulary: {len(self.vocabulary)} unique words")
         print(f"   - Brands: {len(self.brand_names)}")
@@ -145,164 +250,482 @@ class EcommerceSpellCorrector:
     
     def _tokenize(self, text: str) -> List[str]:
         """Tokenize text into words, handling e-commerce specific cases."""
-        if not text or text == 'nan':
-            return []
+        return tokenize_text(text)
+    
+    def queries_path(self) -> str:
+        """Optional logged search queries (one per line) next to the products file."""
+        return os.path.splitext(self.products_file)[0] + "_queries.txt"
+    
+    def _build_ngram_model(self, title_sentences: List[List[str]]):
+        """Build the hashed n-gram model from tokenized titles and any logged queries."""
+        self.ngram_model = HashedNgramModel()
+        self.ngram_model.add_sentences(title_sentences)
+        
+        queries_file = self.queries_path()
+        if os.path.exists(queries_file):
+            with open(queries_file, 'r', encoding='utf-8') as f:
+                query_sentences = [self._tokenize(line) for line in f if line.strip()]
+            self.ngram_model.add_sentences(query_sentences)
+            print(f"✅ Added {len(query_sentences)} logged queries to the n-gram model")
+    
+    def _build_edit_index(self):
+        """Build the symmetric-delete index over the vocabulary."""
+        if not self.vocabulary:
+            return
+        self.edit_index = SymmetricDeleteIndex.build(self.vocabulary)
+        print(f"✅ Built edit-distance index: {len(self.edit_index.keys)} delete keys")
+    
+    def artifact_path(self) -> str:
+        """Saved spell artifact lives next to the products file."""
+        return os.path.splitext(self.products_file)[0] + "_spell.npz"
+    
+    def _catalog_fingerprint(self) -> Optional[str]:
+        if self.fingerprint is None and os.path.exists(self.products_file):
+            from catalog import catalog_fingerprint
+            self.fingerprint = catalog_fingerprint(self.products_file)
+        return self.fingerprint
+    
+    def _queries_fingerprint(self) -> str:
+        """Content hash of the logged queries feeding the n-gram model ('' if there are none)."""
+        queries_file = self.queries_path()
+        if not os.path.exists(queries_file):
+            return ""
+        from catalog import catalog_fingerprint
+        return catalog_fingerprint(queries_file)
+    
+    def _save_artifact(self):
+        """Write vocabulary, frequencies, word roles, n-grams and lookup indexes to one .npz."""
+        fingerprint = self._catalog_fingerprint()
+        if fingerprint is None or not self.vocabulary:
+            return
         
-        # Remove special characters but keep alphanumeric and spaces
-        text = re.sub(r'[^\w\s-]', ' ', text)
+        words = sorted(self.vocabulary)
+        word_ids = {word: i for i, word in enumerate(words)}
+        flags = np.zeros(len(words), dtype=np.uint8)
+        for role_words, flag in ((self.brand_names, FLAG_BRAND), (self.product_names, FLAG_PRODUCT),
+                                 (self.category_terms, FLAG_CATEGORY)):
+            for word in role_words:
+                flags[word_ids[word]] |= flag
+        
+        path = self.artifact_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        arrays = {
+            "format": np.array(ARTIFACT_FORMAT),
+            "fingerprint": np.array(fingerprint),
+            "queries_fingerprint": np.array(self._queries_fingerprint()),
+            "words": np.array(words, dtype=str),
+            "frequencies": np.array([self.word_frequencies[w] for w in words], dtype=np.int64),
+            "flags": flags,
+            "word_phonetic_keys": np.array([phonetic_key(w) for w in words], dtype=str),
+        }
+        if self.ngram_model is not None:
+            arrays.update(self.ngram_model.to_arrays("ngram_"))
+        if self.edit_index is not None:
+            arrays.update(self.edit_index.to_arrays("edit_"))
+        if self.phonetic_index is not None:
+            arrays.update(self.phonetic_index.to_arrays("phonetic_index_"))
+        try:
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, path)
+            print(f"✅ Saved spell artifact to {path}")
+        except OSError as e:
+            print(f"⚠️ Could not save spell artifact {path}: {e}")
+    
+    def _load_artifact(self) -> bool:
+        """
+        Load the saved spell artifact if it was built from the current catalog
+        and logged queries.
+        
+        Returns:
+            True if vocabulary and indexes were loaded, False if they must be rebuilt
+        """
+        path = self.artifact_path()
+        if not os.path.exists(path):
+            return False
+        fingerprint = self._catalog_fingerprint()
+        queries_fingerprint = self._queries_fingerprint()
+        try:
+            with np.load(path) as data:
+                if int(data["format"]) != ARTIFACT_FORMAT or str(data["fingerprint"]) != fingerprint or \
+                        str(data["queries_fingerprint"]) != queries_fingerprint:
+                    return False
+                words = data["words"].tolist()
+                frequencies = data["frequencies"].tolist()
+                flags = data["flags"]
+                ngram_model = HashedNgramModel.from_arrays(data, "ngram_") if "ngram_tables" in data else None
+                phonetic_keys = data["word_phonetic_keys"].tolist()
+                edit_index = SymmetricDeleteIndex.from_arrays(data, "edit_") if "edit_keys" in data else None
+                phonetic_index = SymmetricDeleteIndex.from_arrays(data, "phonetic_index_") \
+                    if "phonetic_index_keys" in data else None
+        except Exception as e:
+            print(f"⚠️ Could not load spell artifact {path}: {e}")
+            return False
+        
+        self.vocabulary = set(words)
+        self.word_frequencies = Counter(dict(zip(words, frequencies)))
+        self.brand_names = {w for w, f in zip(words, flags) if f & FLAG_BRAND}
+        self.product_names = {w for w, f in zip(words, flags) if f & FLAG_PRODUCT}
+        self.category_terms = {w for w, f in zip(words, flags) if f & FLAG_CATEGORY}
+        self.ngram_model = ngram_model
+        self.phonetic_words = {}
+        for word, key in zip(words, phonetic_keys):
+            self.phonetic_words.setdefault(key, []).append(word)
+        self.edit_index = edit_index
+        self.phonetic_index = phonetic_index
+        print(f"✅ Loaded spell artifact from {path}: {len(self.vocabulary)} words")
+        return True
+    
+    def _build_phonetic_index(self):
+        """Group the vocabulary by phonetic key and index the keys for distance-1 lookups."""
+        self.phonetic_words = defaultdict(list)
+        for word in sorted(self.vocabulary):
+            self.phonetic_words[phonetic_key(word)].append(word)
+        self.phonetic_words = dict(self.phonetic_words)
+        if self.phonetic_words:
+            self.phonetic_index = SymmetricDeleteIndex.build(self.phonetic_words, max_distance=1)
+    
+    def _build_segmenter(self):
+        """Build the word-break trie from the catalog word frequencies."""
+        if self.word_frequencies:
+            self.segmenter = WordSegmenter(self.word_frequencies)
+    
+    def _segment_word(self, word: str) -> Optional[List[str]]:
+        """
+        Split an unknown run-together token into vocabulary words.
+        Tokens the maps already handle, or that are a single edit away from a
+        catalog word, are treated as typos rather than missing spaces.
+        """
+        if self.segmenter is None or len(word) < MIN_SEGMENT_LENGTH:
+            return None
+        if word in self.vocabulary or word in self.typo_to_correct or word in self.ecommerce_expansions:
+            return None
+        pieces = self.segmenter.segment(word)
+        if not pieces or len(pieces) < 2:
+            return None
+        if self._get_edit_distance_candidates(word, max_distance=1):
+            return None
+        return pieces
+    
+    def _build_priority_embeddings(self):
+        """Embed the priority vocabulary once; skipped if it hasn't changed since the last build."""
+        if not self.semantic_enabled:
+            return
         
-        # Split on whitespace and hyphens
-        words = re.split(r'[\s\-_]+', text.lower())
+        # Deterministic selection: most frequent brand/product terms, ties alphabetical
+        priority_vocab = sorted(self.brand_names.union(self.product_names),
+                                key=lambda w: (-self.word_frequencies[w], w))[:MAX_PRIORITY_VOCAB]
+        vocab_hash = vocabulary_hash(priority_vocab)
+        if vocab_hash == self._priority_vocab_hash:
+            return
         
-        # Filter out empty strings and very short words
-        words = [w.strip() for w in words if w.strip() and len(w.strip()) > 1]
+        if not priority_vocab:
+            self.priority_vocab, self.priority_embeddings = [], None
+            self._priority_vocab_hash = vocab_hash
+            return
         
-        return words
+        try:
+            embeddings = np.asarray(self.semantic_model.encode(priority_vocab), dtype=np.float32)
+        except Exception as e:
+            print(f"⚠️ Could not embed priority vocabulary: {e}")
+            return
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.priority_vocab = priority_vocab
+        self.priority_embeddings = embeddings / norms
+        self._priority_vocab_hash = vocab_hash
+        print(f"✅ Embedded {len(priority_vocab)} priority vocabulary terms for semantic candidates")
     
-    def _build_ngrams(self):
-        """Build bigram and trigram frequency maps."""
-        all_words = list(self.word_frequencies.keys())
-        
-        # Build bigrams
-        for i in range(len(all_words) - 1):
-            bigram = (all_words[i], all_words[i + 1])
-            self.bigrams[bigram] += 1
-        
-        # Build trigrams  
-        for i in range(len(all_words) - 2):
-            trigram = (all_words[i], all_words[i + 1], all_words[i + 2])
-            self.trigrams[trigram] += 1
+    def _load_rewrites(self):
+        """Load the expansion and typo maps from the rewrites data file."""
+        if not os.path.exists(self.rewrites_file):
+            print(f"⚠️ Rewrites file {self.rewrites_file} not found, no expansions or typo maps")
+            return
+        with open(self.rewrites_file, 'r', encoding='utf-8') as f:
+            rewrites = json.load(f)
+        self.ecommerce_expansions = {k.lower(): v.lower() for k, v in rewrites.get('expansions', {}).items()}
+        self.common_typos = {k.lower(): v for k, v in rewrites.get('typos', {}).items()}
     
     def _build_correction_maps(self):
-        """Build reverse lookup maps for common typos."""
+        """Build reverse lookup maps for common typos and the query rewrite automaton."""
         self.typo_to_correct = {}
         
         for correct_word, typos in self.common_typos.items():
             for typo in typos:
                 self.typo_to_correct[typo.lower()] = correct_word
+        
+        # Typos take precedence over expansions for the same source, as in correct_word
+        patterns = [(tokenize_text(source), ("expansion", target))
+                    for source, target in self.ecommerce_expansions.items()]
+        patterns += [(tokenize_text(typo), ("typo_map", correct))
+                     for typo, correct in self.typo_to_correct.items()]
+        self.rewriter = AhoCorasick(patterns)
+    
+    def _accept_rewrite(self, words: List[str], start: int, end: int, rewrite: Tuple[str, str]) -> bool:
+        """
+        Single known words are never rewritten and expansions must land on catalog
+        words; multi-word phrases are rewritten only to catalog words.
+        """
+        kind, target = rewrite
+        # Identity rewrites would report a correction that changes nothing
+        if target.split() == words[start:end]:
+            return False
+        if end - start == 1:
+            if words[start] in self.vocabulary:
+                return False
+            return kind == "typo_map" or target in self.vocabulary
+        return all(word in self.vocabulary for word in target.split())
+    
+    def _rewrite_phrases(self, words: List[str]) -> Tuple[List[str], Set[int], List[Dict[str, any]], List[int]]:
+        """
+        Apply typo and expansion rewrites to the whole token sequence in one pass.
+        
+        Returns:
+            Rewritten words, positions that came from a rewrite, their corrections
+            (positioned at the original token they start at), and the original token
+            index of every rewritten word
+        """
+        origins = list(range(len(words)))
+        if self.rewriter is None or not len(self.rewriter):
+            return words, set(), [], origins
+        began = time.perf_counter()
+        matches = self.rewriter.find_longest(
+            words, lambda start, end, rewrite: self._accept_rewrite(words, start, end, rewrite))
+        if not matches:
+            return words, set(), [], origins
+        
+        rewritten, fixed, corrections, origins = [], set(), [], []
+        position = 0
+        for start, end, (kind, target) in matches:
+            rewritten.extend(words[position:start])
+            origins.extend(range(position, start))
+            target_words = target.split()
+            corrections.append({
+                "original": " ".join(words[start:end]),
+                "corrected": target,
+                "position": start
+            })
+            fixed.update(range(len(rewritten), len(rewritten) + len(target_words)))
+            rewritten.extend(target_words)
+            origins.extend([start] * len(target_words))
+            position = end
+        rewritten.extend(words[position:])
+        origins.extend(range(position, len(words)))
+        
+        elapsed_ms = (time.perf_counter() - began) * 1000
+        for _, _, (kind, _) in matches:
+            self.word_tiers.record(kind, elapsed_ms / len(matches))
+        return rewritten, fixed, corrections, origins
     
     def _get_edit_distance_candidates(self, word: str, max_distance: int = 2) -> List[Tuple[str, int]]:
         """Get candidates based on edit distance."""
         candidates = []
         word_lower = word.lower()
         
-        for vocab_word in self.vocabulary:
-            distance = Levenshtein.distance(word_lower, vocab_word)
+        if self.edit_index is not None and max_distance <= self.edit_index.max_distance:
+            matches = self.edit_index.candidates(word_lower, max_distance)
+        else:
+            matches = [(vocab_word, Levenshtein.distance(word_lower, vocab_word)) for vocab_word in self.vocabulary]
+        
+        for vocab_word, distance in matches:
             if distance <= max_distance:
                 # Weight by frequency and distance
                 score = self.word_frequencies[vocab_word] / (distance + 1)
                 candidates.append((vocab_word, score))
         
-        return sorted(candidates, key=lambda x: x[1], reverse=True)
+        # Ties broken alphabetically so the choice doesn't depend on set iteration order
+        return sorted(candidates, key=lambda x: (-x[1], x[0]))
     
     def _get_phonetic_candidates(self, word: str) -> List[str]:
         """Get candidates based on phonetic similarity."""
-        candidates = []
-        word_lower = word.lower()
+        if self.phonetic_index is None:
+            return []
         
-        # Simple phonetic rules for common e-commerce terms
-        phonetic_rules = [
-            ('ph', 'f'), ('ck', 'k'), ('c', 'k'), ('z', 's'),
-            ('i', 'y'), ('ei', 'ai'), ('ou', 'ow'), ('tion', 'shun')
-        ]
-        
-        transformed = word_lower
-        for old, new in phonetic_rules:
-            transformed = transformed.replace(old, new)
-        
-        # Find vocabulary words that match the phonetically transformed word
-        for vocab_word in self.vocabulary:
-            vocab_transformed = vocab_word
-            for old, new in phonetic_rules:
-                vocab_transformed = vocab_transformed.replace(old, new)
-            
-            if Levenshtein.distance(transformed, vocab_transformed) <= 1:
-                candidates.append(vocab_word)
+        transformed = phonetic_key(word.lower())
         
-        return candidates
+        # Vocabulary words whose phonetic key is within distance 1 of the transformed word
+        candidates = []
+        for key, _ in self.phonetic_index.candidates(transformed, max_distance=1):
+            candidates.extend(self.phonetic_words[key])
+        
+        return sorted(candidates)
     
     def _get_semantic_candidates(self, word: str, context: str = "") -> List[str]:
         """Get semantically similar candidates."""
-        if not self.semantic_enabled:
+        if not self.semantic_enabled or self.priority_embeddings is None:
             return []
         
         candidates = []
         query_text = f"{context} {word}".strip()
         
         try:
-            query_embedding = self.semantic_model.encode([query_text])
+            query_embedding = np.asarray(self.semantic_model.encode([query_text]), dtype=np.float32)[0]
+            norm = np.linalg.norm(query_embedding)
+            if norm > 0:
+                query_embedding = query_embedding / norm
             
-            # Get embeddings for vocabulary subset (brands and product terms)
-            priority_vocab = list(self.brand_names.union(self.product_names))[:1000]  # Limit for performance
-            vocab_embeddings = self.semantic_model.encode(priority_vocab)
-            
-            # Calculate similarities
-            similarities = cosine_similarity(query_embedding, vocab_embeddings)[0]
+            # Cosine similarity against the cached, normalized priority vocabulary
+            similarities = self.priority_embeddings @ query_embedding
             
             # Get top similar words
-            top_indices = np.argsort(similarities)[-10:][::-1]
+            top_k = min(10, len(similarities))
+            top_indices = np.argpartition(-similarities, top_k - 1)[:top_k]
+            top_indices = top_indices[np.argsort(-similarities[top_indices], kind="stable")]
             for idx in top_indices:
                 if similarities[idx] > 0.7:  # High similarity threshold
-                    candidates.append(priority_vocab[idx])
+                    candidates.append(self.priority_vocab[idx])
             
         except Exception as e:
             print(f"⚠️ Semantic similarity error: {e}")
         
         return candidates
     
-    def correct_word(self, word: str, context: str = "") -> Optional[str]:
-        """Correct a single word using multiple approaches."""
+    def _context_weights(self, prev_word: Optional[str], next_word: Optional[str],
+                         prev2_word: Optional[str] = None):
+        """Per-candidate multiplier (>= 1) favouring words that fit between their neighbours."""
+        if self.ngram_model is None or not (prev_word or next_word):
+            return lambda candidate: 1.0
+        weights = {}
+        
+        def weight(candidate: str) -> float:
+            if candidate not in weights:
+                weights[candidate] = 1 + CONTEXT_WEIGHT * self.ngram_model.context_score(
+                    candidate, prev_word, next_word, prev2_word)
+            return weights[candidate]
+        return weight
+    
+    def _symspell_correction(self, word_lower: str, context_weight=None) -> Optional[str]:
+        """
+        SymSpell's correction when it is confident: a single edit away, clearly ahead
+        of any other suggestion once frequencies are re-weighted by the n-gram context
+        (as in the full pipeline), and no other catalog word equally close.
+        """
+        if self.symspell is None:
+            return None
+        suggestions = self.symspell.lookup(word_lower, Verbosity.CLOSEST, max_edit_distance=2)
+        # Distance 0 means the curated dictionary knows the token (it also lists some typos)
+        if not suggestions or suggestions[0].distance != 1:
+            return None
+        if context_weight is None:
+            context_weight = lambda candidate: 1.0
+        ranked = sorted(((s.count * context_weight(s.term), s.term) for s in suggestions),
+                        key=lambda x: (-x[0], x[1]))
+        best_score, best = ranked[0]
+        # Only trust corrections the catalog can actually match
+        if best not in self.vocabulary:
+            return None
+        if len(ranked) > 1 and ranked[1][0] * SYMSPELL_DOMINANCE > best_score:
+            return None
+        for candidate, _ in self._get_edit_distance_candidates(word_lower, max_distance=1):
+            if candidate != best:
+                return None
+        return best
+    
+    def correct_word(self, word: str, context: str = "", deadline=None,
+                     prev_word: Optional[str] = None, next_word: Optional[str] = None,
+                     prev2_word: Optional[str] = None) -> Optional[str]:
+        """Correct a single word using multiple approaches (neighbours re-rank edit candidates)."""
+        began = time.perf_counter()
+        corrected, tier = self._correct_word(word, context, deadline, prev_word, next_word, prev2_word)
+        self.word_tiers.record(tier, (time.perf_counter() - began) * 1000)
+        return corrected
+    
+    def _correct_word(self, word: str, context: str, deadline,
+                      prev_word: Optional[str], next_word: Optional[str],
+                      prev2_word: Optional[str]) -> Tuple[Optional[str], str]:
+        """Correction of one word and the name of the tier that produced it."""
         word_lower = word.lower()
         
         # Check if word is already correct
         if word_lower in self.vocabulary:
-            return word_lower
+            return word_lower, "known"
         
-        # Check common typos first
+        # Check common typos first; their correct forms are never corrected away
         if word_lower in self.typo_to_correct:
-            return self.typo_to_correct[word_lower]
+            return self.typo_to_correct[word_lower], "typo_map"
+        if word_lower in self.common_typos:
+            return word_lower, "typo_map"
         
         # Check expansions
         if word_lower in self.ecommerce_expansions:
             expanded = self.ecommerce_expansions[word_lower]
             if expanded in self.vocabulary:
-                return expanded
+                return expanded, "expansion"
+        
+        # Context only affects the semantic stage, so leave it out of the key when that's off
+        cache_key = (word_lower, context if self.priority_embeddings is not None else "",
+                     prev2_word, prev_word, next_word)
+        cached = self.word_cache.get(cache_key, _MISSING)
+        if cached is not _MISSING:
+            return cached, "cache"
+        
+        # Candidate scores are re-weighted by how well they fit the n-gram context
+        context_weight = self._context_weights(prev_word, next_word, prev2_word)
+        
+        # Fast tier: a confident SymSpell answer skips phonetic and semantic candidates
+        symspell_corrected = self._symspell_correction(word_lower, context_weight)
+        if symspell_corrected is not None:
+            self.word_cache.put(cache_key, symspell_corrected)
+            return symspell_corrected, "symspell"
+        complete = True
         
         all_candidates = []
         
         # Get edit distance candidates
-        edit_candidates = self._get_edit_distance_candidates(word)
+        edit_candidates = [(candidate, score * context_weight(candidate))
+                           for candidate, score in self._get_edit_distance_candidates(word)]
+        edit_candidates.sort(key=lambda x: (-x[1], x[0]))
         for candidate, score in edit_candidates[:10]:  # Top 10
             all_candidates.append((candidate, score, 'edit'))
         
         # Get phonetic candidates
         phonetic_candidates = self._get_phonetic_candidates(word)
         for candidate in phonetic_candidates:
-            score = self.word_frequencies[candidate] * 0.8  # Lower weight than edit distance
+            score = self.word_frequencies[candidate] * 0.8 * context_weight(candidate)  # Lower weight than edit distance
             all_candidates.append((candidate, score, 'phonetic'))
         
-        # Get semantic candidates
-        semantic_candidates = self._get_semantic_candidates(word, context)
+        # Get semantic candidates (optional stage, dropped when the request budget is short)
+        if deadline is None:
+            semantic_candidates = self._get_semantic_candidates(word, context)
+        elif deadline.can_afford("spell_semantic_candidates"):
+            with deadline.track("spell_semantic_candidates"):
+                semantic_candidates = self._get_semantic_candidates(word, context)
+        else:
+            deadline.skip("spell_semantic_candidates")
+            semantic_candidates = []
+            complete = False
         for candidate in semantic_candidates:
-            score = self.word_frequencies[candidate] * 0.9  # Higher weight for semantic
+            score = self.word_frequencies[candidate] * 0.9 * context_weight(candidate)  # Higher weight for semantic
             all_candidates.append((candidate, score, 'semantic'))
         
-        if not all_candidates:
-            return None
-        
-        # Sort by score and return best candidate
-        all_candidates.sort(key=lambda x: x[1], reverse=True)
-        best_candidate = all_candidates[0]
-        
-        # Only return if confidence is reasonable
-        if best_candidate[1] > 1.0:  # Minimum confidence threshold
-            return best_candidate[0]
-        
-        return None
+        corrected = None
+        if all_candidates:
+            # Sort by score and return best candidate
+            all_candidates.sort(key=lambda x: x[1], reverse=True)
+            best_candidate = all_candidates[0]
+            
+            # Only return if confidence is reasonable
+            if best_candidate[1] > 1.0:  # Minimum confidence threshold
+                corrected = best_candidate[0]
+        
+        # Results computed without the semantic stage are not cached
+        if complete:
+            self.word_cache.put(cache_key, corrected)
+        return corrected, "full"
+    
+    def correct_query(self, query: str, deadline=None) -> Dict[str, any]:
+        """Correct a full query and return detailed results (optionally within a Deadline)."""
+        began = time.perf_counter()
+        result, tier = self._correct_query(query, deadline)
+        self.query_tiers.record(tier, (time.perf_counter() - began) * 1000)
+        return result
     
-    def correct_query(self, query: str) -> Dict[str, any]:
-        """Correct a full query and return detailed results."""
+    def _correct_query(self, query: str, deadline) -> Tuple[Dict[str, any], str]:
+        """Correction result for a query and the tier that produced it."""
         original_query = query.strip()
+        cached = self.query_cache.get(original_query)
+        if cached is not None:
+            return self._copy_result(cached), "query_cache"
+        
         words = self._tokenize(original_query)
         
         if not words:
@@ -311,13 +734,58 @@ class EcommerceSpellCorrector:
                 "corrected": original_query,
                 "corrections_made": False,
                 "word_corrections": []
-            }
+            }, "empty"
+        
+        num_tokens = len(words)
+        words, fixed, word_corrections, origins = self._rewrite_phrases(words)
+        
+        # Fast path: every token is a known word, nothing to correct
+        if not word_corrections and all(word in self.vocabulary for word in words):
+            return {
+                "original": original_query,
+                "corrected": original_query,
+                "corrections_made": False,
+                "word_corrections": [],
+                "confidence": 0.0
+            }, "fast_path"
         
         corrected_words = []
-        word_corrections = []
-        corrections_made = False
+        corrections_made = bool(word_corrections)
+        
+        # Split run-together tokens first so the pieces get context like any other word;
+        # every piece keeps the original token index it came from
+        segmented_words = []
+        segmented_origins = []
+        segmented_fixed = set()
+        for i, word in enumerate(words):
+            if i in fixed:
+                segmented_fixed.add(len(segmented_words))
+                segmented_words.append(word)
+                segmented_origins.append(origins[i])
+                continue
+            pieces = self._segment_word(word)
+            if pieces:
+                word_corrections.append({
+                    "original": word,
+                    "corrected": " ".join(pieces),
+                    "position": origins[i],
+                    "segmented": True
+                })
+                corrections_made = True
+                segmented_words.extend(pieces)
+                segmented_origins.extend([origins[i]] * len(pieces))
+            else:
+                segmented_words.append(word)
+                segmented_origins.append(origins[i])
+        words = segmented_words
+        origins = segmented_origins
         
         for i, word in enumerate(words):
+            # Rewritten words are final, they only serve as context for their neighbours
+            if i in segmented_fixed:
+                corrected_words.append(word)
+                continue
+            
             # Build context from surrounding words
             context_words = []
             if i > 0:
@@ -326,27 +794,58 @@ class EcommerceSpellCorrector:
                 context_words.append(words[i+1])
             context = " ".join(context_words)
             
-            corrected_word = self.correct_word(word, context)
+            # The n-gram model sees the already corrected words on the left
+            corrected_word = self.correct_word(
+                word, context, deadline,
+                prev_word=corrected_words[i-1] if i > 0 else None,
+                next_word=words[i+1] if i < len(words) - 1 else None,
+                prev2_word=corrected_words[i-2] if i > 1 else None
+            )
             
             if corrected_word and corrected_word != word.lower():
                 corrected_words.append(corrected_word)
                 word_corrections.append({
                     "original": word,
                     "corrected": corrected_word,
-                    "position": i
+                    "position": origins[i]
                 })
                 corrections_made = True
             else:
                 corrected_words.append(word.lower())
         
         corrected_query = " ".join(corrected_words)
+        # Rewrites are recorded before the per-word pass; report corrections in query order
+        word_corrections.sort(key=lambda c: c["position"])
         
-        return {
+        result = {
             "original": original_query,
             "corrected": corrected_query if corrections_made else original_query,
             "corrections_made": corrections_made,
             "word_corrections": word_corrections,
-            "confidence": len(word_corrections) / len(words) if words else 0
+            "confidence": len(word_corrections) / num_tokens
+        }
+        if deadline is None or not deadline.skipped:
+            self.query_cache.put(original_query, self._copy_result(result))
+        return result, "tokens"
+    
+    @staticmethod
+    def _copy_result(result: Dict[str, any]) -> Dict[str, any]:
+        """Copy a correction result so cached entries can't be mutated by callers."""
+        return dict(result, word_corrections=[dict(c) for c in result["word_corrections"]])
+    
+    def cache_stats(self) -> Dict[str, any]:
+        """Hit/miss counters of the correction caches and the all-known fast path."""
+        return {
+            "tokens": self.word_cache.stats(),
+            "queries": self.query_cache.stats(),
+            "fast_path_hits": self.query_tiers.count("fast_path")
+        }
+    
+    def tier_stats(self) -> Dict[str, any]:
+        """Per-tier hit rates and mean latency, for queries and for individual words."""
+        return {
+            "queries": self.query_tiers.snapshot(),
+            "words": self.word_tiers.snapshot()
         }
 
 
@@ -360,6 +859,11 @@ def get_corrector() -> EcommerceSpellCorrector:
         _spell_corrector = EcommerceSpellCorrector()
     return _spell_corrector
 
+def set_corrector(corrector: EcommerceSpellCorrector):
+    """Replace the shared spell corrector instance (used by catalog reloads)."""
+    global _spell_corrector
+    _spell_corrector = corrector
+
 def get_corrected_query(query: str) -> Optional[str]:
     """Legacy function for backward compatibility."""
     corrector = get_corrector()
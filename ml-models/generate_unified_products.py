@@ -6,6 +6,7 @@ with embeddings for semantic search and recommendations.
 """
 
 import pandas as pd
+import argparse
 import json
 import numpy as np
 from sentence_transformers import SentenceTransformer
@@ -13,6 +14,8 @@ import ast
 from tqdm import tqdm
 import os
 
+from multi_vector import MultiVectorIndex
+
 def clean_and_extract_text(row):
     """Extract clean text for embedding generation."""
     title = str(row.get('product_name', ''))
@@ -63,7 +66,7 @@ def safe_float(value):
     except:
         return 0.0
 
-def main():
+def main(multi_vector: bool = False):
     print("🚀 Generating unified product data with embeddings...")
     
     # Load CSV data
@@ -143,6 +146,19 @@ def main():
     # Show file size
     file_size = os.path.getsize(output_file) / (1024 * 1024)  # MB
     print(f"Output file size: {file_size:.1f} MB")
+
+    # Optional per-field embeddings (title + description chunks) for max-sim scoring
+    if multi_vector:
+        fields_file = 'unified_products_fields.npz'
+        print(f"\n🧩 Generating per-field embeddings into {fields_file}...")
+        field_index = MultiVectorIndex.build(
+            model,
+            [p['title'] for p in unified_products],
+            [p['description'] for p in unified_products]
+        )
+        field_index.save(fields_file, [p['id'] for p in unified_products])
+        print(f"✅ Saved {len(field_index.vectors)} field embeddings "
+              f"({os.path.getsize(fields_file) / (1024 * 1024):.1f} MB)")
     
     print("\n🔧 Next steps:")
     print("1. Update main.py to use unified_products.json")
@@ -150,4 +166,8 @@ def main():
     print("3. Update frontend to handle new product structure")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate unified product data with embeddings")
+    parser.add_argument("--multi-vector", action="store_true",
+                        help="Also write per-field (title/description chunk) embeddings")
+    args = parser.parse_args()
+    main(multi_vector=args.multi_vector)
\ No newline at end of file
@@ -1,22 +1,28 @@
 from fastapi import FastAPI, Request, UploadFile, File, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import torch
-import numpy as np
 import pandas as pd
-import json
 import shutil
 import sys
 import os
-from pathlib import Path
 
 # Import local modules
-from ecommerce_spell_correction import get_detailed_correction, get_corrected_query
+from ecommerce_spell_correction import get_detailed_correction, get_corrected_query, set_corrector, get_corrector
+from spell_batch import iter_corrections, iter_ndjson
+from catalog import (CatalogSnapshot, CatalogReloader, build_catalog_snapshot,
+                     export_shared_catalog, release_shared_catalog, default_shared_dir, SHARED_CATALOG_ENV)
+from ranking import rank
+from deadline import Deadline, stage_latencies
+from lru_cache import LRUCache
+from sharded_search import ShardedSearcher
 from caption_image import generate_caption
-from seasonal_recommendations import SeasonalRecommendationSystem
+from seasonal_recommendations import (SeasonalRecommendationSystem, seasonal_picks_path, interleave_festival_matches,
+                                      SEASONAL_SEARCH_TERMS)
 
 # Add src directory to path for two-tower model
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
@@ -73,6 +79,9 @@ class SimilarItem(BaseModel):
     rating: float
     similarity_score: float
 
+class SpellBatchRequest(BaseModel):
+    queries: List[str] = Field(..., description="Queries to spell-correct")
+
 class APIResponse(BaseModel):
     success: bool
     message: str
@@ -287,189 +296,95 @@ class FlipkartPredictor:
 predictor = None
 search_model = SentenceTransformer('all-MiniLM-L6-v2')
 seasonal_system = None
-products = []
-suggestion_bank = []
+PRODUCTS_FILE = "unified_products.json"
 
-# Helper functions for filtering and sorting
+# Number of uvicorn worker processes started by `python main.py`
+WORKERS = int(os.environ.get("WORKERS", "1"))
 
-def _parse_rating(rating_str: str) -> float:
-    """Parse rating string to extract numeric rating."""
-    if not rating_str or rating_str == "No rating available":
-        return 0.0
-    
-    try:
-        # Extract numbers from rating string (e.g., "4.2 out of 5" -> 4.2)
-        import re
-        numbers = re.findall(r'\d+\.?\d*', str(rating_str))
-        if numbers:
-            return float(numbers[0])
-    except:
-        pass
-    
-    return 0.0
+# Number of shard worker processes serving semantic /search (1 = score in-process)
+SEARCH_SHARDS = int(os.environ.get("SEARCH_SHARDS", "1"))
 
-def _extract_category_terms(category_str: str) -> List[str]:
-    """Extract category terms from category string."""
-    if not category_str or category_str == 'nan':
-        return []
-    
-    try:
-        if category_str.startswith('[') and category_str.endswith(']'):
-            category_clean = category_str[2:-2]  # Remove ["..."]
-            levels = [level.strip().lower() for level in category_clean.split(">>")]
-            return levels
-    except:
-        pass
-    
-    return [category_str.lower()]
+# When set (e.g. by the preloading parent in __main__), workers memory-map the
+# catalog arrays from this directory instead of each holding a private copy.
+# Sharded search always needs the export, since shard processes attach to it.
+SHARED_CATALOG_DIR = os.environ.get(SHARED_CATALOG_ENV) or (default_shared_dir() if SEARCH_SHARDS > 1 else None)
 
-def _passes_filters(product: Dict, minPrice: float, maxPrice: float, rating: int, brands: str, categories: str) -> bool:
-    """Check if product passes all applied filters."""
-    
-    # Price filter
-    if minPrice is not None and product["price"] < minPrice:
-        return False
-    if maxPrice is not None and product["price"] > maxPrice:
-        return False
-    
-    # Rating filter
-    if rating is not None and rating > 0:
-        product_rating = _parse_rating(product["rating"])
-        if product_rating < rating:
-            return False
-    
-    # Brand filter
-    if brands:
-        brand_list = [b.strip().lower() for b in brands.split(',') if b.strip()]
-        product_brand = product["brand"].lower()
-        if brand_list and product_brand not in brand_list:
-            return False
-    
-    # Category filter
-    if categories:
-        category_list = [c.strip().lower() for c in categories.split(',') if c.strip()]
-        product_categories = _extract_category_terms(product["category"])
-        if category_list and not any(cat in product_categories for cat in category_list):
-            return False
-    
-    return True
+# The current catalog snapshot. Handlers read this reference once per request;
+# reloads build a new snapshot in the background and replace it in one assignment.
+catalog = CatalogSnapshot.empty()
 
-def _sort_products(products_list: List[Dict], sort_option: str) -> List[Dict]:
-    """Sort products based on the specified option."""
-    
-    if sort_option == "price_asc":
-        return sorted(products_list, key=lambda x: x["price"])
-    elif sort_option == "price_desc":
-        return sorted(products_list, key=lambda x: x["price"], reverse=True)
-    elif sort_option == "rating":
-        return sorted(products_list, key=lambda x: _parse_rating(x["rating"]), reverse=True)
-    elif sort_option == "newest":
-        # For now, maintain current order as we don't have date information
-        return products_list
-    else:  # relevance (default)
-        return sorted(products_list, key=lambda x: x["score"], reverse=True)
-
-def _get_dynamic_filters() -> Dict:
-    """Generate dynamic filter options based on actual product data."""
-    if not products:
-        return {"brands": [], "categories": [], "price_range": {"min": 0, "max": 5000}}
-    
-    # Extract unique brands
-    brands = set()
-    categories = set()
-    prices = []
-    
-    for product in products:
-        # Brands
-        brand = product.get("brand", "").strip()
-        if brand and brand.lower() not in ['', 'nan', 'none']:
-            brands.add(brand)
-        
-        # Categories
-        category_terms = _extract_category_terms(product.get("category", ""))
-        for term in category_terms:
-            if len(term.strip()) > 2:
-                categories.add(term.strip().title())
-        
-        # Prices
-        price = product.get("discounted_price", 0.0) or product.get("retail_price", 0.0)
-        if price > 0:
-            prices.append(price)
-    
-    # Calculate price range
-    min_price = int(min(prices)) if prices else 0
-    max_price = int(max(prices)) if prices else 5000
-    
+# Recent complete /search responses, served when a request's budget is too short to run the pipeline
+search_cache = LRUCache(maxsize=2048)
+
+# Helper functions for filtering and sorting
+
+def _search_result(p: Dict, score: float) -> Dict:
+    """Shape a catalog product for the /search response."""
     return {
-        "brands": sorted(list(brands))[:20],  # Top 20 brands
-        "categories": sorted(list(categories))[:15],  # Top 15 categories
-        "price_range": {
-            "min": min_price,
-            "max": max_price
-        }
+        "id": p.get("id", ""),
+        "title": p["title"], 
+        "description": p["description"][:200] + "..." if len(p["description"]) > 200 else p["description"],
+        "brand": p.get("brand", ""),
+        "category": p.get("category", ""),
+        "price": p.get("discounted_price", 0.0) if p.get("discounted_price", 0.0) > 0 else p.get("retail_price", 0.0),
+        "retail_price": p.get("retail_price", 0.0),
+        "discounted_price": p.get("discounted_price", 0.0),
+        "image": p.get("image", ""),
+        "rating": p.get("rating", "No rating available"),
+        "score": float(score)
     }
 
-from src.trie import Trie
-trie = Trie()
+def _prepare_seasonal_picks(snapshot: CatalogSnapshot):
+    """Load or recompute the month -> catalog product picks for a snapshot."""
+    if seasonal_system is None or not len(snapshot):
+        return
+    try:
+        seasonal_system.prepare_catalog_picks(snapshot.embeddings, snapshot.prices > 0, snapshot.ids,
+                                              snapshot.fingerprint, seasonal_picks_path(PRODUCTS_FILE))
+    except Exception as e:
+        print(f"⚠️  Failed to prepare seasonal picks: {e}")
+
+def _publish_catalog(snapshot: CatalogSnapshot):
+    """Atomically make a fully built snapshot the one served to new requests."""
+    global catalog
+    _prepare_seasonal_picks(snapshot)
+    if SEARCH_SHARDS > 1 and snapshot.shared_path and len(snapshot):
+        snapshot.sharded_searcher = ShardedSearcher(snapshot.shared_path, len(snapshot), SEARCH_SHARDS)
+    previous = catalog
+    set_corrector(snapshot.spell_corrector)
+    catalog = snapshot
+    if previous.sharded_searcher is not None:
+        previous.sharded_searcher.close()
+    if previous.shared_path and previous.shared_path != snapshot.shared_path:
+        release_shared_catalog(previous.shared_path)
+
+catalog_reloader = CatalogReloader(on_ready=_publish_catalog)
+
+def _spell_correct(snapshot: CatalogSnapshot, query: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """Spell-correct a query against the vocabulary of the given snapshot."""
+    if deadline is not None:
+        if not deadline.can_afford("spell_correction"):
+            deadline.skip("spell_correction")
+            return {"original": query, "corrected": query, "corrections_made": False,
+                    "word_corrections": [], "confidence": 0}
+        with deadline.track("spell_correction"):
+            if snapshot.spell_corrector is not None:
+                return snapshot.spell_corrector.correct_query(query, deadline=deadline)
+    if snapshot.spell_corrector is not None:
+        return snapshot.spell_corrector.correct_query(query)
+    return get_detailed_correction(query)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services when the app starts"""
-    global predictor, products, suggestion_bank
+    global predictor
 
     # Load products for search functionality
     try:
-        with open("unified_products.json", "r", encoding='utf-8') as f:
-            products = json.load(f)
-
-        # --- Build the category suggestion bank as before ---
-        categories_set = set()
-        for p in products:
-            category = p.get("category", "")
-            if category and category != 'nan':
-                try:
-                    # Remove the outer brackets and quotes, split by '>>' for hierarchy
-                    if category.startswith('[') and category.endswith(']'):
-                        category_clean = category[2:-2]  # Remove ["..."]
-                        levels = [level.strip() for level in category_clean.split(">>")]
-
-                        # Add each level and parent paths
-                        for i, level in enumerate(levels):
-                            if level and len(level) > 2:
-                                categories_set.add(level)
-                                if i > 0:
-                                    parent_path = " >> ".join(levels[:i+1])
-                                    categories_set.add(parent_path)
-                except:
-                    # Fallback: add the raw category
-                    if len(category) > 2:
-                        categories_set.add(category)
-        suggestion_bank = sorted(list(categories_set))
-
-        # --- Build trie with product titles and all suggestion bank values ---
-        titles_inserted = 0
-        category_suggestions_inserted = 0
-
-        # Insert product titles into trie
-        for p in products:
-            title = p.get("title", "").strip()
-            if title:
-                trie.insert(title)
-                titles_inserted += 1
-
-        # Insert category suggestions into trie (if not already present)
-        for suggestion in suggestion_bank:
-            trie.insert(suggestion)
-            category_suggestions_inserted += 1
-
-        print(f"✅ Loaded {len(products)} unified products for search")
-        print(f"✅ Built {len(suggestion_bank)} category suggestions")
-        print(f"✅ Inserted {titles_inserted} product titles and {category_suggestions_inserted} category suggestions into trie!")
-
+        _publish_catalog(build_catalog_snapshot(PRODUCTS_FILE, semantic_model=search_model, version=1,
+                                                shared_dir=SHARED_CATALOG_DIR))
     except FileNotFoundError:
         print("⚠️  unified_products.json not found. Search functionality will be limited.")
-        products = []
-        suggestion_bank = []
 
     # Initialize two-tower predictor (optional)
     if TWO_TOWER_AVAILABLE:
@@ -490,19 +405,27 @@ async def startup_event():
         global seasonal_system
         csv_path = "Product,Month,Season.csv"
         if os.path.exists(csv_path):
-            seasonal_system = SeasonalRecommendationSystem(csv_path)
+            seasonal_system = SeasonalRecommendationSystem(csv_path, model=search_model)
+            _prepare_seasonal_picks(catalog)
             print("✅ Seasonal recommendation system initialized successfully!")
         else:
             print("⚠️  Seasonal data file not found. Seasonal recommendations will be disabled.")
     except Exception as e:
         print(f"⚠️  Failed to initialize seasonal recommendation system: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background worker processes"""
+    if catalog.sharded_searcher is not None:
+        catalog.sharded_searcher.close()
+
 
 # API Endpoints
 
 @app.get("/", response_model=APIResponse)
 async def root():
     """Root endpoint with API information"""
+    snapshot = catalog
     return APIResponse(
         success=True,
         message="Unified Search & Recommendation API is running!",
@@ -513,7 +436,7 @@ async def root():
                 "spell_correction": True,
                 "image_captioning": True,
                 "two_tower_recommendations": predictor is not None,
-                "total_products": len(products)
+                "total_products": len(snapshot)
             },
             "total_users": len(predictor.model_data['users_df']) if predictor else 0,
             "total_products_in_model": len(predictor.model_data['products_df']) if predictor else 0
@@ -523,11 +446,12 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    snapshot = catalog
     return {
         "status": "healthy",
         "message": "API is running",
         "services": {
-            "search": len(products) > 0,
+            "search": len(snapshot) > 0,
             "spell_correction": True,
             "image_captioning": True,
             "recommendations": predictor is not None,
@@ -550,6 +474,8 @@ async def get_seasonal_recommendations(
     if seasonal_system is None:
         raise HTTPException(status_code=503, detail="Seasonal recommendation system not available")
     
+    snapshot = catalog
+    products = snapshot.products
     if not products:
         raise HTTPException(status_code=503, detail="Product catalog not available")
     
@@ -559,80 +485,73 @@ async def get_seasonal_recommendations(
         current_time = datetime.now()
         current_month = month if month else current_time.strftime("%B")
         
-        # Get seasonal recommendations from the CSV (both month-specific and season-general)
-        seasonal_recommendations = seasonal_system.get_seasonal_recommendations_with_fallback(
-            search_query=query,
-            month=current_month,
-            top_k=15,  # Get more seasonal items to work with
-            min_similarity=0.05
-        )
-        
         # Get season for the month
         season = seasonal_system.get_season_for_month(current_month)
 
-        # Combine the user's query with seasonal context for a powerful semantic search
-        seasonal_keywords = " ".join(rec['product'] for rec in seasonal_recommendations[:5]) # Top 5 seasonal terms
+        # Festivals active for the requested month, or for today's date
+        festivals = seasonal_system.get_active_festivals(month=month, day=current_time.date())
+        festival_limit = max(1, top_k // 2) if festivals else 0
+
+        # Picks depend only on the month (and festival), so they are precomputed per catalog version
+        picks = seasonal_system.get_catalog_picks(current_month, snapshot.fingerprint)
+        if picks is not None:
+            search_terms = picks["search_terms"]
+            matches = picks["matches"]
+            festival_matches = seasonal_system.get_festival_picks(festivals, snapshot.fingerprint, festival_limit)
+        else:
+            # Get seasonal recommendations from the CSV (both month-specific and season-general)
+            seasonal_recommendations = seasonal_system.get_seasonal_recommendations_with_fallback(
+                search_query=query,
+                month=current_month,
+                top_k=15,  # Get more seasonal items to work with
+                min_similarity=0.05
+            )
+
+            # Create a list of search terms: the top seasonal keywords
+            search_terms = [rec['product'] for rec in seasonal_recommendations[:SEASONAL_SEARCH_TERMS]]
 
-        # Create a list of search terms: the original query + top seasonal keywords
-        search_terms = [rec['product'] for rec in seasonal_recommendations[:5]]
+            # Look up the terms' precomputed embeddings and match them to the catalog in one pass
+            matches = seasonal_system.match_terms_to_catalog(
+                search_terms, snapshot.embeddings, snapshot.prices > 0, snapshot.ids
+            )
+            festival_matches = interleave_festival_matches(
+                [seasonal_system.match_festival_to_catalog(f, snapshot.embeddings, snapshot.prices > 0, snapshot.ids)
+                 for f in festivals],
+                festival_limit
+            )
 
         print(search_terms)
 
-        # Get all product embeddings once
-        product_embeddings = np.array([p["embedding"] for p in products])
-        
-        # Initialize final products list
-        final_products = []
-        used_product_ids = set()
+        # Festival products are boosted ahead of the seasonal ones, without repeating a product
+        festival_ids = {str(snapshot.ids[m["index"]]) for m in festival_matches}
+        matches = festival_matches + [m for m in matches if str(snapshot.ids[m["index"]]) not in festival_ids]
 
-        # Process each search term and get the TOP 1 result for each
-        for term in search_terms:
-            term_embedding = search_model.encode([term])
-            similarities = cosine_similarity(term_embedding, product_embeddings)[0]
-            
-            # Find the best matching product for this specific term
-            best_score = -1
-            best_product = None
-            best_index = -1
-            
-            for i, score in enumerate(similarities):
-                product = products[i]
-                product_id = product.get("id", "")
-                price = product.get("discounted_price", 0.0) if product.get("discounted_price", 0.0) > 0 else product.get("retail_price", 0.0)
-                
-                # Only consider products with valid price and not already used
-                if price > 0 and product_id not in used_product_ids and score > best_score:
-                    best_score = score
-                    best_product = product
-                    best_index = i
-            
-            # Add the best product for this term if found
-            if best_product is not None:
-                used_product_ids.add(best_product.get("id", ""))
-                
-                final_products.append({
-                    "id": best_product.get("id", ""),
-                    "title": best_product.get("title", ""),
-                    "description": best_product.get("description", "")[:200] + "..." if len(best_product.get("description", "")) > 200 else best_product.get("description", ""),
-                    "brand": best_product.get("brand", ""),
-                    "category": best_product.get("category", ""),
-                    "price": float(best_product.get("discounted_price", 0.0) if best_product.get("discounted_price", 0.0) > 0 else best_product.get("retail_price", 0.0)),
-                    "retail_price": float(best_product.get("retail_price", 0.0)),
-                    "discounted_price": float(best_product.get("discounted_price", 0.0)),
-                    "image": best_product.get("image", ""),
-                    "rating": best_product.get("rating", "No rating available"),
-                    "relevance_score": float(best_score),
-                    "seasonal_term": term,  # Which seasonal term matched this product
-                    "seasonal_context": f"Best match for '{term}' in {season} season",
-                    "season": season,
-                    "month": current_month,
-                    "rank": len(final_products) + 1,
-                    "match_percentage": f"{round(best_score * 100, 1)}% match for {term}"
-                })
-                
-                # Stop if we have enough products
-                if len(final_products) >= top_k:
-                    break
+        final_products = []
+        for match in matches[:top_k]:
+            best_product = products[match["index"]]
+            best_score = match["score"]
+            term = match["term"]
+            festival = match.get("festival")
+            final_products.append({
+                "id": best_product.get("id", ""),
+                "title": best_product.get("title", ""),
+                "description": best_product.get("description", "")[:200] + "..." if len(best_product.get("description", "")) > 200 else best_product.get("description", ""),
+                "brand": best_product.get("brand", ""),
+                "category": best_product.get("category", ""),
+                "price": float(best_product.get("discounted_price", 0.0) if best_product.get("discounted_price", 0.0) > 0 else best_product.get("retail_price", 0.0)),
+                "retail_price": float(best_product.get("retail_price", 0.0)),
+                "discounted_price": float(best_product.get("discounted_price", 0.0)),
+                "image": best_product.get("image", ""),
+                "rating": best_product.get("rating", "No rating available"),
+                "relevance_score": float(best_score),
+                "seasonal_term": term,  # Which seasonal term matched this product
+                "seasonal_context": f"Best match for '{term}' for {festival}" if festival else f"Best match for '{term}' in {season} season",
+                "festival": festival,
+                "season": season,
+                "month": current_month,
+                "rank": len(final_products) + 1,
+                "match_percentage": f"{round(float(best_score) * 100, 1)}% match for {term}"
+            })
 
         return {
             "success": True,
@@ -640,6 +559,7 @@ async def get_seasonal_recommendations(
             "search_terms_used": search_terms,
             "month": current_month,
             "season": season,
+            "festivals": festivals,
             "timestamp": current_time.isoformat(),
             "recommendations": final_products,
             "total_results": len(final_products)
@@ -655,18 +575,19 @@ async def semantic_search(request: Request):
     """Semantic search with keyword matching priority and auto spell correction"""
     body = await request.json()
     original_query = body["query"]
+    deadline = Deadline.from_request(body.get("timeout_ms"), request.headers)
+    snapshot = catalog
+    products = snapshot.products
     
     # Apply spell correction
-    spell_result = get_detailed_correction(original_query)
+    spell_result = _spell_correct(snapshot, original_query, deadline if deadline.bounded else None)
     query = spell_result["corrected"] if spell_result["corrections_made"] else original_query
     query_lower = query.lower()
 
     if not products:
         raise HTTPException(status_code=503, detail="Product database not available")
 
-    query_embedding = search_model.encode([query])
-    product_embeddings = np.array([p["embedding"] for p in products])
-    similarities = cosine_similarity(query_embedding, product_embeddings)[0]
+    similarities = snapshot.score(search_model.encode([query])[0])
 
     keyword_matches = []
     others = []
@@ -692,8 +613,8 @@ async def semantic_search(request: Request):
             "discounted_price": discounted_price,
             "image": image,
             "rating": rating,
-            "match": f"{round(semantic_score * 100, 2)}%",
-            "score": round(semantic_score, 4)
+            "match": f"{round(float(semantic_score) * 100, 2)}%",
+            "score": round(float(semantic_score), 4)
         }
 
         if query_lower in title.lower():
@@ -707,7 +628,7 @@ async def semantic_search(request: Request):
     final_results = keyword_matches + others
     
     # Return results with spell correction metadata
-    return {
+    response = {
         "results": final_results[:20],
         "spell_correction": {
             "original_query": original_query,
@@ -717,9 +638,13 @@ async def semantic_search(request: Request):
         },
         "total_results": len(final_results)
     }
+    if deadline.bounded:
+        response["deadline"] = deadline.report()
+    return response
 
 @app.get("/search")
 async def search(
+    request: Request,
     query: str = Query(...),
     semantic: bool = Query(False),
     sort: str = Query("relevance"),
@@ -727,78 +652,141 @@ async def search(
     maxPrice: float = Query(None),
     rating: int = Query(None),
     brands: str = Query(None),
-    categories: str = Query(None)
+    categories: str = Query(None),
+    routed: bool = Query(False, description="Score only the closest top-level category partitions"),
+    multi_vector: bool = Query(False, description="Max-sim over title and description chunk embeddings"),
+    timeout_ms: float = Query(None, description="Latency budget; optional stages are dropped to meet it (also X-Timeout-Ms header)")
 ):
     """Enhanced search with filtering, sorting, and spell correction"""
     original_query = query.strip()
+    snapshot = catalog
+    products = snapshot.products
+    deadline = Deadline.from_request(timeout_ms, request.headers)
     
     if not original_query:
-        return {"suggestions": [], "results": [], "filters": _get_dynamic_filters()}
+        return {"suggestions": [], "results": [], "filters": snapshot.filters}
 
     if not products:
         return {"suggestions": [], "results": [], "error": "Product database not available"}
 
+    # Under a tight budget, prefer the last complete answer for this exact request
+    cache_key = (snapshot.version, original_query, semantic, sort, minPrice, maxPrice,
+                 rating, brands, categories, routed, multi_vector)
+    # Only the stages this request will run: keyword-only searches never encode or scan
+    planned_stages = ["spell_correction"]
+    if semantic:
+        scan_stage = "multi_vector_scoring" if multi_vector and snapshot.field_index is not None else "full_scan"
+        planned_stages += ["query_encoding", scan_stage]
+    if deadline.bounded and not deadline.can_afford(*planned_stages):
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            deadline.served_from_cache = True
+            return {**cached, "deadline": deadline.report()}
+
     # Apply spell correction
-    spell_result = get_detailed_correction(original_query)
+    spell_result = _spell_correct(snapshot, original_query, deadline if deadline.bounded else None)
     corrected_query = spell_result["corrected"] if spell_result["corrections_made"] else original_query
     query_lower = corrected_query.lower()
 
-    suggestions = [s for s in suggestion_bank if query_lower in s.lower()]
-    suggestions = sorted(suggestions)[:6]
+    suggestions = []
+    if deadline.can_afford("suggestions"):
+        with deadline.track("suggestions"):
+            suggestions = snapshot.suggestion_index.search(query_lower, limit=6)
+    else:
+        deadline.skip("suggestions")
+
+    spell_correction = {
+        "original_query": original_query,
+        "corrected_query": corrected_query,
+        "corrections_made": spell_result["corrections_made"],
+        "word_corrections": spell_result["word_corrections"] if spell_result["corrections_made"] else []
+    }
 
     if not semantic:
-        return {
+        response = {
             "suggestions": suggestions,
-            "filters": _get_dynamic_filters(),
-            "spell_correction": {
-                "original_query": original_query,
-                "corrected_query": corrected_query,
-                "corrections_made": spell_result["corrections_made"],
-                "word_corrections": spell_result["word_corrections"] if spell_result["corrections_made"] else []
-            }
+            "filters": snapshot.filters,
+            "spell_correction": spell_correction
         }
+        return _finish_search(response, deadline, cache_key)
 
     # Semantic search with corrected query
-    query_embedding = search_model.encode([corrected_query])
-    product_embeddings = np.array([p["embedding"] for p in products])
-    similarities = cosine_similarity(query_embedding, product_embeddings)[0]
-
-    # Create products with scores and apply filters
-    scored_products = []
-    for p, score in zip(products, similarities):
-        product = {
-            "id": p.get("id", ""),
-            "title": p["title"], 
-            "description": p["description"][:200] + "..." if len(p["description"]) > 200 else p["description"],
-            "brand": p.get("brand", ""),
-            "category": p.get("category", ""),
-            "price": p.get("discounted_price", 0.0) if p.get("discounted_price", 0.0) > 0 else p.get("retail_price", 0.0),
-            "retail_price": p.get("retail_price", 0.0),
-            "discounted_price": p.get("discounted_price", 0.0),
-            "image": p.get("image", ""),
-            "rating": p.get("rating", "No rating available"),
-            "score": float(score)
-        }
-        
-        # Apply filters
-        if _passes_filters(product, minPrice, maxPrice, rating, brands, categories):
-            scored_products.append(product)
-    
-    # Apply sorting
-    scored_products = _sort_products(scored_products, sort)
+    with deadline.track("query_encoding"):
+        query_embedding = snapshot.normalize_query(search_model.encode([corrected_query])[0])
+    filters = {"minPrice": minPrice, "maxPrice": maxPrice, "rating": rating,
+               "brands": brands, "categories": categories}
+
+    use_fields = multi_vector and snapshot.field_index is not None
+    if use_fields and not deadline.can_afford("multi_vector_scoring"):
+        deadline.skip("multi_vector_scoring")
+        use_fields = False
+
+    # Category routing: score only the closest partitions when the router is confident,
+    # or unconditionally the single closest one when a full scan no longer fits the budget
+    routing = None
+    if snapshot.router is not None and not use_fields:
+        if not deadline.can_afford("full_scan"):
+            routing = snapshot.router.route(query_embedding, max_partitions=1, force=True)
+            if routing["routed"]:
+                deadline.skip("full_scan")
+        elif routed:
+            routing = snapshot.router.route(query_embedding)
+
+    # Scatter-gather across shard workers when enabled, otherwise rank in-process
+    hits = None
+    if snapshot.sharded_searcher is not None and not use_fields and not (routing and routing["routed"]):
+        # Off the event loop, so concurrent requests scatter to the shards in parallel
+        hits = await run_in_threadpool(snapshot.sharded_searcher.search, query_embedding, filters, sort, k=20)
+    if hits is not None:
+        top_indices, top_scores, total_results = hits["indices"], hits["scores"], hits["total"]
+    elif routing and routing["routed"]:
+        similarities, candidates = snapshot.router.score(query_embedding, routing["partition_ids"])
+        top_indices, _, top_scores, total_results = rank(
+            similarities, snapshot.prices[candidates], snapshot.ratings[candidates],
+            snapshot.brands[candidates], snapshot.category_keys[candidates],
+            filters, sort, k=20, indices=candidates
+        )
+    else:
+        stage = "multi_vector_scoring" if use_fields else "full_scan"
+        with deadline.track(stage):
+            if use_fields:
+                similarities = snapshot.field_index.score(query_embedding)
+            else:
+                similarities = snapshot.embeddings @ query_embedding
+            top_indices, _, top_scores, total_results = rank(
+                similarities, snapshot.prices, snapshot.ratings, snapshot.brands,
+                snapshot.category_keys, filters, sort, k=20
+            )
 
-    return {
+    scored_products = [_search_result(products[i], score) for i, score in zip(top_indices, top_scores)]
+
+    response = {
         "suggestions": suggestions,
-        "results": scored_products[:20],
-        "filters": _get_dynamic_filters(),
-        "total_results": len(scored_products),
-        "spell_correction": {
-            "original_query": original_query,
-            "corrected_query": corrected_query,
-            "corrections_made": spell_result["corrections_made"],
-            "word_corrections": spell_result["word_corrections"] if spell_result["corrections_made"] else []
-        }
+        "results": scored_products,
+        "filters": snapshot.filters,
+        "total_results": int(total_results),
+        "scoring": "multi_vector" if use_fields else "single_vector",
+        "spell_correction": spell_correction
     }
+    if hits is not None:
+        response["sharding"] = {
+            "num_shards": len(hits["shard_latencies_ms"]),
+            "shard_sizes": hits["shard_sizes"],
+            "shard_latencies_ms": hits["shard_latencies_ms"],
+            "total_ms": hits["total_ms"]
+        }
+    if routing is not None and (routed or routing["routed"]):
+        routing.pop("partition_ids")
+        response["routing"] = routing
+    return _finish_search(response, deadline, cache_key)
+
+def _finish_search(response: Dict, deadline: Deadline, cache_key: tuple) -> Dict:
+    """Cache complete responses and attach the deadline report for budgeted requests."""
+    if not deadline.skipped:
+        search_cache.put(cache_key, response)
+    if deadline.bounded:
+        response = {**response, "deadline": deadline.report()}
+    return response
 
 @app.get("/spell-correct")
 async def spell_correct(query: str = Query(...), detailed: bool = Query(False)):
@@ -818,6 +806,15 @@ async def spell_correct(query: str = Query(...), detailed: bool = Query(False)):
         correction = get_corrected_query(query)
         return {"correction": correction, "original": query}
 
+@app.post("/spell-correct/batch")
+async def spell_correct_batch(request: SpellBatchRequest):
+    """Spell-correct a list of queries, streamed back in order as NDJSON (one result per line)"""
+    snapshot = catalog
+    corrector = snapshot.spell_corrector if snapshot.spell_corrector is not None else get_corrector()
+    # In-process: forking a pool inside a threaded server worker is not safe
+    results = iter_corrections(corrector, request.queries)
+    return StreamingResponse(iter_ndjson(results), media_type="application/x-ndjson")
+
 @app.get("/spellcheck")
 async def spellcheck_alias(query: str = Query(...), detailed: bool = Query(False)):
     """Alias for spell correction endpoint to match frontend expectations"""
@@ -826,7 +823,7 @@ async def spellcheck_alias(query: str = Query(...), detailed: bool = Query(False
 @app.get("/filters")
 async def get_filters():
     """Get available filter options based on current product data"""
-    return _get_dynamic_filters()
+    return catalog.filters
 
 @app.post("/image-to-caption")
 async def image_to_caption(file: UploadFile = File(...)):
@@ -926,11 +923,18 @@ async def get_similar_items(request: SimilarItemsRequest):
 async def get_statistics():
     """Get dataset and model statistics"""
     try:
+        snapshot = catalog
         stats = {
-            "search_products": len(products),
-            "suggestion_bank_size": len(suggestion_bank),
+            "search_products": len(snapshot),
+            "suggestion_bank_size": len(snapshot.suggestion_bank),
+            "catalog_version": snapshot.version,
+            "catalog_built_at": snapshot.built_at,
+            "stage_latency_estimates_ms": stage_latencies.snapshot(),
+            "search_cache": search_cache.stats(),
+            "spell_cache": snapshot.spell_corrector.cache_stats() if snapshot.spell_corrector is not None else None,
+            "spell_tiers": snapshot.spell_corrector.tier_stats() if snapshot.spell_corrector is not None else None,
             "services": {
-                "semantic_search": len(products) > 0,
+                "semantic_search": len(snapshot) > 0,
                 "spell_correction": True,
                 "image_captioning": True,
                 "recommendations": predictor is not None
@@ -957,13 +961,58 @@ async def get_statistics():
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     
 @app.get("/suggest")
-async def suggest(query: str = Query(...), max_results: int = 10):
+async def suggest(query: str = Query(...), max_results: int = 10, fuzzy: bool = Query(True)):
     prefix = query.strip().lower()
     if not prefix or len(prefix) < 1:
         return {"suggestions": []}
-    matches = trie.search_prefix(prefix, max_results=max_results)
+    # Typo-tolerant completions come after the exact-prefix ones
+    if fuzzy:
+        matches = catalog.trie.fuzzy_search_prefix(prefix, max_results=max_results)
+    else:
+        matches = catalog.trie.search_prefix(prefix, max_results=max_results)
     return {"suggestions": matches}
 
+# Admin Endpoints
+
+@app.post("/admin/reload")
+async def reload_catalog():
+    """Rebuild the catalog snapshot in the background and swap it in when complete"""
+    if WORKERS > 1:
+        # Only the worker receiving this request would reload, leaving the others on the old catalog
+        raise HTTPException(status_code=409,
+                            detail="Catalog reload is only supported with WORKERS=1; restart the server to reload")
+    next_version = catalog.version + 1
+    if not catalog_reloader.start(PRODUCTS_FILE, semantic_model=search_model, version=next_version,
+                                  shared_dir=SHARED_CATALOG_DIR):
+        raise HTTPException(status_code=409, detail="A catalog reload is already in progress")
+    return {
+        "success": True,
+        "message": f"Catalog reload started (version {next_version})",
+        "status": catalog_reloader.status()
+    }
+
+@app.get("/admin/reload")
+async def reload_status():
+    """Progress and outcome of the most recent catalog reload"""
+    snapshot = catalog
+    return {
+        "status": catalog_reloader.status(),
+        "active_catalog": {
+            "version": snapshot.version,
+            "built_at": snapshot.built_at,
+            "products": len(snapshot),
+            "source": snapshot.source,
+            "shared_memory": snapshot.shared
+        }
+    }
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    if WORKERS > 1:
+        # Preload the catalog arrays once in the parent; workers attach to them zero-copy
+        shared_dir = os.environ.setdefault(SHARED_CATALOG_ENV, default_shared_dir())
+        if os.path.exists(PRODUCTS_FILE):
+            export_shared_catalog(PRODUCTS_FILE, shared_dir)
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Multi-vector product representation.
+Besides the single combined embedding, each product can carry one embedding for
+its title and one per description chunk. All field vectors live in one flat
+matrix with per-product segment offsets, so late-interaction (max-sim) scoring is
+a single matrix-vector product followed by a segmented max.
+
+Build the field store with `python generate_unified_products.py --multi-vector`
+and compare latency against single-vector scoring with
+`python multi_vector.py --benchmark`.
+"""
+
+import argparse
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+FIELD_TITLE = 0
+FIELD_DESCRIPTION = 1
+
+DEFAULT_CHUNK_WORDS = 48
+MAX_DESCRIPTION_CHUNKS = 4
+
+# Field vectors upcast to float32 per scoring step
+SCORE_BLOCK_ROWS = 16384
+
+
+def chunk_words(text: str, chunk_size: int = DEFAULT_CHUNK_WORDS,
+                max_chunks: int = MAX_DESCRIPTION_CHUNKS) -> List[str]:
+    """Split text into chunks of at most chunk_size words."""
+    words = text.split()
+    chunks = [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
+    return chunks[:max_chunks]
+
+
+def field_texts(title: str, description: str) -> Tuple[List[str], List[int]]:
+    """Texts to embed for one product: always the title, then description chunks."""
+    title = "" if title in ("nan", "None") else title
+    description = "" if description in ("nan", "None") else description
+    texts = [title.strip()]
+    types = [FIELD_TITLE]
+    for chunk in chunk_words(description):
+        texts.append(chunk)
+        types.append(FIELD_DESCRIPTION)
+    return texts, types
+
+
+class MultiVectorIndex:
+    """
+    Flat matrix of normalized field embeddings with segment offsets per product.
+    Held as float16 (possibly memory-mapped from the shared catalog export); scoring
+    upcasts one block of rows at a time so BLAS does the work without a float32 copy.
+    """
+
+    def __init__(self, vectors: np.ndarray, offsets: np.ndarray, field_types: np.ndarray):
+        self.vectors = np.asarray(vectors, dtype=np.float16)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.field_types = np.asarray(field_types, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.offsets.nbytes + self.field_types.nbytes
+
+    @classmethod
+    def build(cls, model, titles: List[str], descriptions: List[str],
+              batch_size: int = 64) -> "MultiVectorIndex":
+        """Embed the title and description chunks of every product."""
+        texts, types, offsets = [], [], [0]
+        for title, description in zip(titles, descriptions):
+            product_texts, product_types = field_texts(title, description)
+            texts.extend(product_texts)
+            types.extend(product_types)
+            offsets.append(len(texts))
+
+        vectors = np.asarray(model.encode(texts, batch_size=batch_size, show_progress_bar=True),
+                             dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return cls(vectors / norms, np.array(offsets), np.array(types))
+
+    def save(self, path: str, ids: List[str]):
+        """Write the store compactly (float16 vectors) alongside the product ids."""
+        np.savez(path, ids=np.array(ids, dtype=str), **self.to_arrays())
+
+    @staticmethod
+    def array_names(prefix: str = "") -> List[str]:
+        return [f"{prefix}vectors", f"{prefix}offsets", f"{prefix}field_types"]
+
+    def to_arrays(self, prefix: str = "") -> Dict[str, np.ndarray]:
+        """Index arrays keyed by name, e.g. for the shared catalog export."""
+        return dict(zip(self.array_names(prefix), (self.vectors, self.offsets, self.field_types)))
+
+    @classmethod
+    def from_arrays(cls, data, prefix: str = "") -> "MultiVectorIndex":
+        """Rebuild an index from arrays written by to_arrays (memory-mapped arrays are not copied)."""
+        return cls(data[f"{prefix}vectors"], data[f"{prefix}offsets"], data[f"{prefix}field_types"])
+
+    @classmethod
+    def load(cls, path: str, ids: Optional[np.ndarray] = None) -> Optional["MultiVectorIndex"]:
+        """Load a field store; returns None if it doesn't match the catalog ids."""
+        with np.load(path) as data:
+            if ids is not None and not np.array_equal(data["ids"], np.asarray(ids)):
+                print(f"⚠️  {path} does not match the current catalog, multi-vector scoring disabled")
+                return None
+            index = cls.from_arrays(data)
+        print(f"✅ Loaded {len(index.vectors)} field embeddings for {len(index)} products")
+        return index
+
+    def score(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Max-sim over each product's field vectors for a normalized query."""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        flat = np.empty(len(self.vectors), dtype=np.float32)
+        for lo in range(0, len(self.vectors), SCORE_BLOCK_ROWS):
+            hi = lo + SCORE_BLOCK_ROWS
+            flat[lo:hi] = self.vectors[lo:hi].astype(np.float32) @ query
+        return np.maximum.reduceat(flat, self.offsets[:-1])
+
+
+def benchmark(index: MultiVectorIndex, embeddings: np.ndarray, queries: np.ndarray,
+              repeats: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    Compare per-query scoring latency of single-vector and multi-vector modes.
+
+    Args:
+        index: Multi-vector field store
+        embeddings: Normalized single-vector catalog matrix
+        queries: Normalized query embeddings, one per row
+        repeats: Times each query is scored per mode
+
+    Returns:
+        Latency stats (ms) per mode, plus memory footprint in MB
+    """
+    def timed(fn):
+        samples = []
+        for _ in range(repeats):
+            for q in queries:
+                began = time.perf_counter()
+                fn(q)
+                samples.append((time.perf_counter() - began) * 1000)
+        samples = np.array(samples)
+        return {
+            "p50_ms": round(float(np.percentile(samples, 50)), 3),
+            "p95_ms": round(float(np.percentile(samples, 95)), 3),
+            "mean_ms": round(float(samples.mean()), 3),
+        }
+
+    single = timed(lambda q: embeddings @ q)
+    single["memory_mb"] = round(embeddings.nbytes / 2**20, 2)
+    multi = timed(index.score)
+    multi["memory_mb"] = round(index.nbytes / 2**20, 2)
+    multi["vectors_per_product"] = round(len(index.vectors) / max(len(index), 1), 2)
+    return {"single_vector": single, "multi_vector": multi}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-vector latency budget comparison")
+    parser.add_argument("--benchmark", action="store_true", help="Run the latency comparison")
+    parser.add_argument("--products", default="unified_products.json")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return
+
+    from sentence_transformers import SentenceTransformer
+    from catalog import build_catalog_snapshot
+
+    model = SentenceTransformer('all-MiniLM-L6-v2')
+    snapshot = build_catalog_snapshot(args.products, semantic_model=model)
+    index = snapshot.field_index
+    if index is None:
+        print(f"⚠️  No field store found, run generate_unified_products.py --multi-vector first")
+        return
+
+    sample_queries = ["running shoes", "bluetooth headphones", "cotton kurta for women",
+                      "non stick cookware set", "samsung galaxy mobile cover", "diwali lamp"]
+    queries = np.array([snapshot.normalize_query(q) for q in model.encode(sample_queries)])
+    results = benchmark(index, snapshot.embeddings, queries, repeats=args.repeats)
+
+    print(f"\n📊 Scoring latency over {len(snapshot)} products ({len(queries)} queries x {args.repeats})")
+    for mode, stats in results.items():
+        print(f"  {mode:14s} " + "  ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
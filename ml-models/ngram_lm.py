@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Compact hashed n-gram language model for context-aware spell correction.
+Unigram, bigram and trigram counts from tokenized product titles (and optional
+logged queries) are hashed into fixed-size NumPy count tables, so memory is
+bounded by the table size rather than the number of distinct n-grams. Scoring a
+candidate in context is a handful of table lookups.
+
+Compare table sizes with `python ngram_lm.py --report --bits 16 18 20`.
+"""
+
+import argparse
+import json
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+DEFAULT_TABLE_BITS = 18
+MAX_ORDER = 3
+
+# Separator between tokens when hashing an n-gram
+_SEP = "\x1f"
+
+
+def ngram_hash(tokens) -> int:
+    """Stable (process-independent) 32-bit hash of an n-gram."""
+    return zlib.crc32(_SEP.join(tokens).encode("utf-8"))
+
+
+class HashedNgramModel:
+    """Hashed unigram/bigram/trigram counts in one (3, 2**bits) uint32 table."""
+
+    def __init__(self, bits: int = DEFAULT_TABLE_BITS,
+                 tables: Optional[np.ndarray] = None,
+                 distinct: Optional[np.ndarray] = None):
+        self.bits = int(bits)
+        self.mask = (1 << self.bits) - 1
+        self.tables = tables if tables is not None else np.zeros((MAX_ORDER, 1 << self.bits), dtype=np.uint32)
+        # Distinct n-grams per order seen while building, summed over batches (collision report)
+        self.distinct = distinct if distinct is not None else np.zeros(MAX_ORDER, dtype=np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.tables.nbytes
+
+    def add_sentences(self, sentences: Iterable[List[str]]):
+        """Count every 1-, 2- and 3-gram of the given token sequences."""
+        hashes = [[] for _ in range(MAX_ORDER)]
+        for tokens in sentences:
+            for n in range(1, MAX_ORDER + 1):
+                for i in range(len(tokens) - n + 1):
+                    hashes[n - 1].append(ngram_hash(tokens[i:i + n]))
+
+        for order, order_hashes in enumerate(hashes):
+            if not order_hashes:
+                continue
+            full = np.array(order_hashes, dtype=np.uint32)
+            self.distinct[order] += len(np.unique(full))
+            counts = np.bincount(full & self.mask, minlength=1 << self.bits)
+            self.tables[order] += counts.astype(np.uint32)
+
+    def count(self, *tokens: str) -> int:
+        """Hashed count of an n-gram (1 to 3 tokens)."""
+        return int(self.tables[len(tokens) - 1, ngram_hash(tokens) & self.mask])
+
+    def conditional(self, history: List[str], word: str) -> float:
+        """Estimated P(word | history) from the hashed counts (0 if the history is unseen)."""
+        history_count = self.count(*history)
+        if history_count == 0:
+            return 0.0
+        return min(self.count(*history, word) / history_count, 1.0)
+
+    def context_score(self, word: str,
+                      prev_word: Optional[str] = None,
+                      next_word: Optional[str] = None,
+                      prev2_word: Optional[str] = None) -> float:
+        """
+        How well a word fits between its neighbours: sum of P(word | prev),
+        P(next | word) and, with two words of left context, P(word | prev2 prev).
+        """
+        score = 0.0
+        if prev_word:
+            score += self.conditional([prev_word], word)
+            if prev2_word:
+                score += self.conditional([prev2_word, prev_word], word)
+        if next_word:
+            score += self.conditional([word], next_word)
+        return score
+
+    def to_arrays(self, prefix: str = "") -> Dict[str, np.ndarray]:
+        return {f"{prefix}tables": self.tables, f"{prefix}distinct": self.distinct}
+
+    @classmethod
+    def from_arrays(cls, data, prefix: str = "") -> "HashedNgramModel":
+        tables = data[f"{prefix}tables"]
+        return cls(int(np.log2(tables.shape[1])), tables, data[f"{prefix}distinct"])
+
+    def report(self, sample: Optional[List[List[str]]] = None, repeats: int = 5) -> Dict[str, float]:
+        """
+        Memory use, bucket occupancy and estimated collision rate per order, plus the
+        mean latency of a context_score call over the sample sentences.
+        """
+        stats = {
+            "table_bits": self.bits,
+            "memory_mb": round(self.nbytes / 2**20, 3),
+        }
+        for order in range(MAX_ORDER):
+            occupied = int(np.count_nonzero(self.tables[order]))
+            distinct = int(self.distinct[order])
+            stats[f"order{order + 1}_distinct"] = distinct
+            stats[f"order{order + 1}_load_factor"] = round(occupied / (1 << self.bits), 4)
+            stats[f"order{order + 1}_collision_rate"] = round(1 - occupied / distinct, 4) if distinct else 0.0
+
+        if sample:
+            calls = 0
+            began = time.perf_counter()
+            for _ in range(repeats):
+                for tokens in sample:
+                    for i, word in enumerate(tokens):
+                        self.context_score(word,
+                                           tokens[i - 1] if i > 0 else None,
+                                           tokens[i + 1] if i + 1 < len(tokens) else None,
+                                           tokens[i - 2] if i > 1 else None)
+                        calls += 1
+            stats["context_score_us"] = round((time.perf_counter() - began) / max(calls, 1) * 1e6, 3)
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hashed n-gram model memory/latency report")
+    parser.add_argument("--report", action="store_true", help="Build from titles and print the report")
+    parser.add_argument("--products", default="unified_products.json")
+    parser.add_argument("--bits", type=int, nargs="+", default=[16, DEFAULT_TABLE_BITS, 20])
+    args = parser.parse_args()
+
+    if not args.report:
+        parser.print_help()
+        return
+
+    from ecommerce_spell_correction import tokenize_text
+
+    with open(args.products, "r", encoding="utf-8") as f:
+        products = json.load(f)
+    sentences = [tokenize_text(p.get("title", "").lower()) for p in products]
+    sample = sentences[:500]
+
+    print(f"\n📊 Hashed n-gram model over {len(sentences)} titles")
+    for bits in args.bits:
+        model = HashedNgramModel(bits)
+        began = time.perf_counter()
+        model.add_sentences(sentences)
+        build_ms = (time.perf_counter() - began) * 1000
+        stats = model.report(sample)
+        stats["build_ms"] = round(build_ms, 1)
+        print("  " + "  ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
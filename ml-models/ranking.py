@@ -0,0 +1,141 @@
+"""
+Vectorized filtering and ordering for /search.
+Operates on plain NumPy columns so the same code runs in the API process and in
+the shard worker processes, which keeps sharded and single-shard results identical.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Separator used to pack a product's category terms into one searchable string
+CATEGORY_SEP = "\x1f"
+
+SORT_OPTIONS = ("relevance", "price_asc", "price_desc", "rating", "newest")
+
+
+def category_key(terms) -> str:
+    """Pack category terms as SEP-delimited text so membership is a substring test."""
+    return CATEGORY_SEP + CATEGORY_SEP.join(terms) + CATEGORY_SEP
+
+
+def filter_mask(prices: np.ndarray,
+                ratings: np.ndarray,
+                brands: np.ndarray,
+                category_keys: np.ndarray,
+                filters: Dict) -> Optional[np.ndarray]:
+    """
+    Boolean mask of products passing the /search filters (None when nothing is filtered).
+    Mirrors the semantics of the original per-product filter: inclusive price bounds,
+    minimum parsed rating, exact lowercase brand match, any exact category level match.
+    """
+    mask = None
+
+    def combine(current, new):
+        return new if current is None else current & new
+
+    min_price = filters.get("minPrice")
+    max_price = filters.get("maxPrice")
+    if min_price is not None:
+        mask = combine(mask, prices >= min_price)
+    if max_price is not None:
+        mask = combine(mask, prices <= max_price)
+
+    rating = filters.get("rating")
+    if rating is not None and rating > 0:
+        mask = combine(mask, ratings >= rating)
+
+    brands_filter = filters.get("brands")
+    if brands_filter:
+        brand_list = [b.strip().lower() for b in brands_filter.split(',') if b.strip()]
+        if brand_list:
+            mask = combine(mask, np.isin(brands, brand_list))
+
+    categories = filters.get("categories")
+    if categories:
+        category_list = [c.strip().lower() for c in categories.split(',') if c.strip()]
+        if category_list:
+            category_mask = np.zeros(len(category_keys), dtype=bool)
+            for cat in category_list:
+                category_mask |= np.char.find(category_keys, category_key([cat])) >= 0
+            mask = combine(mask, category_mask)
+
+    return mask
+
+
+def sort_keys(sort_option: str,
+              scores: np.ndarray,
+              prices: np.ndarray,
+              ratings: np.ndarray,
+              indices: np.ndarray) -> np.ndarray:
+    """Ascending primary sort key for each candidate; ties are broken by catalog index."""
+    if sort_option == "price_asc":
+        return prices.astype(np.float64)
+    elif sort_option == "price_desc":
+        return -prices.astype(np.float64)
+    elif sort_option == "rating":
+        return -ratings.astype(np.float64)
+    elif sort_option == "newest":
+        # No date information yet: keep catalog order
+        return indices.astype(np.float64)
+    else:  # relevance (default)
+        return -scores.astype(np.float64)
+
+
+def top_k_order(keys: np.ndarray, indices: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k smallest (key, index) pairs, in order."""
+    if len(keys) > k:
+        kth = np.partition(keys, k - 1)[k - 1]
+        candidates = np.flatnonzero(keys <= kth)
+    else:
+        candidates = np.arange(len(keys))
+    order = np.lexsort((indices[candidates], keys[candidates]))
+    return candidates[order[:k]]
+
+
+def rank(scores: np.ndarray,
+         prices: np.ndarray,
+         ratings: np.ndarray,
+         brands: np.ndarray,
+         category_keys: np.ndarray,
+         filters: Dict,
+         sort_option: str,
+         k: int,
+         offset: int = 0,
+         indices: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Filter, order and cut a block of products.
+
+    Args:
+        scores: Cosine scores for the block
+        prices, ratings, brands, category_keys: Catalog columns for the same block
+        filters: Dict with optional minPrice, maxPrice, rating, brands, categories
+        sort_option: One of SORT_OPTIONS
+        k: Number of results to keep
+        offset: Catalog index of the block's first row (for shards)
+        indices: Catalog index of every row, for blocks that are not contiguous
+
+    Returns:
+        (global indices, sort keys, scores, number of products passing the filters)
+    """
+    mask = filter_mask(prices, ratings, brands, category_keys, filters)
+    local = np.flatnonzero(mask) if mask is not None else np.arange(len(scores))
+    global_indices = indices[local] if indices is not None else local + offset
+
+    keys = sort_keys(sort_option, scores[local], prices[local], ratings[local], global_indices)
+    top = top_k_order(keys, global_indices, k)
+    return global_indices[top], keys[top], scores[local][top], len(local)
+
+
+def merge_ranked(parts, k: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Merge per-shard (indices, keys, scores, total) results into the global top k."""
+    total = sum(int(p[3]) for p in parts)
+    parts = [p for p in parts if len(p[0])]
+    if not parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), total
+
+    indices = np.concatenate([p[0] for p in parts])
+    keys = np.concatenate([p[1] for p in parts])
+    scores = np.concatenate([p[2] for p in parts])
+    top = top_k_order(keys, indices, k)
+    return indices[top], scores[top], total
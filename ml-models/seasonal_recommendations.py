@@ -1,30 +1,162 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 from typing import List, Dict, Any, Optional
+import argparse
+import json
 import os
 
+from catalog import catalog_fingerprint
+
+# Number of top seasonal terms matched against the catalog per request
+SEASONAL_SEARCH_TERMS = 5
+
+# Fixed-date festivals (month, day); all others span the month given in the CSV
+FESTIVAL_DATES = {
+    "Republic Day": (1, 26),
+    "Valentine's Day": (2, 14),
+    "Independence Day": (8, 15),
+    "Teacher's Day": (9, 5),
+    "Halloween": (10, 31),
+    "Children's Day": (11, 14),
+    "Christmas": (12, 25),
+    "New Year's Eve": (12, 31),
+}
+
+# Days before a fixed-date festival during which its products are boosted
+FESTIVAL_LEAD_DAYS = 14
+
+# Leap reference year so every (month, day) has a day-of-year slot
+_CALENDAR_YEAR = 2000
+
+
+class CatalogPicks:
+    """
+    Month and festival catalog matches for one catalog fingerprint. Built in full
+    and then published with a single assignment, so a request running during a
+    background reload sees either the old picks or the new ones, never a mix.
+    """
+
+    def __init__(self, fingerprint: str, months: Dict[str, Dict[str, Any]],
+                 festivals: Dict[str, List[Dict[str, Any]]]):
+        self.fingerprint = fingerprint
+        self.months = months
+        self.festivals = festivals
+
+
+class FestivalCalendar:
+    """
+    Festivals from the festival CSV, each with a date range (its shopping window),
+    compiled into a day-of-year table so the festivals active on a date are one lookup.
+    """
+    
+    def __init__(self, csv_path: str = "Product,Month,Festival.csv", lead_days: int = FESTIVAL_LEAD_DAYS):
+        """
+        Load the festival calendar.
+        
+        Args:
+            csv_path: Path to the Product,Month,Festival CSV
+            lead_days: Shopping window before fixed-date festivals
+        """
+        self.csv_path = csv_path
+        self.lead_days = lead_days
+        self.festivals = {}
+        self.month_festivals = {}
+        self.day_festivals = [[] for _ in range(367)]
+        self._load_calendar()
+    
+    def __len__(self) -> int:
+        return len(self.festivals)
+    
+    @staticmethod
+    def _day_of_year(day: date) -> int:
+        return date(_CALENDAR_YEAR, day.month, day.day).timetuple().tm_yday
+    
+    def _load_calendar(self):
+        """Parse the CSV and build the month and day-of-year indexes."""
+        with open(self.csv_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()[1:]
+        
+        for line in lines:
+            if not line.strip():
+                continue
+            # Product names contain unquoted commas, so split month and festival off the right
+            product, month, festival = [part.strip() for part in line.rsplit(',', 2)]
+            if festival not in self.festivals:
+                self.festivals[festival] = {'name': festival, 'month': month, 'products': []}
+                self.month_festivals.setdefault(month.lower(), []).append(festival)
+            self.festivals[festival]['products'].append(product)
+        
+        for order, (name, festival) in enumerate(self.festivals.items()):
+            if name in FESTIVAL_DATES:
+                month, day = FESTIVAL_DATES[name]
+                end = date(_CALENDAR_YEAR, month, day)
+                start = end - timedelta(days=self.lead_days)
+            else:
+                month = datetime.strptime(festival['month'], "%B").month
+                start = date(_CALENDAR_YEAR, month, 1)
+                end = (date(_CALENDAR_YEAR + month // 12, month % 12 + 1, 1) - timedelta(days=1))
+            festival['start'] = start.strftime("%m-%d")
+            festival['end'] = end.strftime("%m-%d")
+            
+            current = start
+            while current <= end:
+                self.day_festivals[self._day_of_year(current)].append(((end - start).days, order, name))
+                current += timedelta(days=1)
+        
+        # Narrow windows (fixed-date festivals) first, then CSV order
+        self.day_festivals = [[name for _, _, name in sorted(entries)] for entries in self.day_festivals]
+        print(f"✅ Loaded festival calendar: {len(self.festivals)} festivals")
+    
+    def festivals_on(self, day: date) -> List[str]:
+        """Festivals whose shopping window contains the given date."""
+        return list(self.day_festivals[self._day_of_year(day)])
+    
+    def festivals_for_month(self, month: str) -> List[str]:
+        """Festivals listed under a month in the CSV, in CSV order."""
+        return list(self.month_festivals.get(month.lower(), []))
+    
+    def products_for(self, festival: str) -> List[str]:
+        """Products associated with a festival, in CSV order."""
+        return list(self.festivals.get(festival, {}).get('products', []))
+
 class SeasonalRecommendationSystem:
     """
     A system that provides seasonal product recommendations based on the current month
     and uses semantic search to find relevant products from the seasonal CSV data.
     """
     
-    def __init__(self, csv_path: str = "Product,Month,Season.csv", model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, csv_path: str = "Product,Month,Season.csv", model_name: str = "all-MiniLM-L6-v2",
+                 model: Optional[SentenceTransformer] = None,
+                 festival_csv_path: str = "Product,Month,Festival.csv"):
         """
         Initialize the seasonal recommendation system.
         
         Args:
             csv_path: Path to the CSV file containing seasonal product data
             model_name: Name of the sentence transformer model to use
+            model: Already loaded sentence transformer to reuse instead of loading model_name
+            festival_csv_path: Path to the CSV mapping products to festivals
         """
         self.csv_path = csv_path
-        self.model = SentenceTransformer(model_name)
+        self.model = model if model is not None else SentenceTransformer(model_name)
         self.seasonal_data = None
         self.product_embeddings = None
+        self.normalized_embeddings = None
+        self.product_rows = {}
+        # Lookup tables compiled from the CSV at load time, keyed by lowercase month
+        self.month_rows = {}
+        self.month_season = {}
+        self.month_recommendations = {}
+        self.csv_fingerprint = None
+        self.festival_calendar = None
+        self.festival_csv_fingerprint = None
+        # Precomputed month/festival catalog matches (CatalogPicks), replaced as a whole
+        self.catalog_picks = None
         self._load_seasonal_data()
+        self._load_festival_calendar(festival_csv_path)
     
     def _load_seasonal_data(self):
         """Load seasonal product data from CSV and create embeddings."""
@@ -34,12 +166,330 @@ class SeasonalRecommendationSystem:
                 # Create embeddings for all products
                 products = self.seasonal_data['Product'].tolist()
                 self.product_embeddings = self.model.encode(products)
+                # Normalized copy and name -> row map so terms can be looked up, not re-encoded
+                norms = np.linalg.norm(self.product_embeddings, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                self.normalized_embeddings = (self.product_embeddings / norms).astype(np.float32)
+                for row, name in enumerate(products):
+                    self.product_rows.setdefault(name, row)
+                self._build_month_index()
+                self.csv_fingerprint = catalog_fingerprint(self.csv_path)
                 print(f"✅ Loaded {len(self.seasonal_data)} seasonal products")
             else:
                 print(f"⚠️  Seasonal data file not found: {self.csv_path}")
         except Exception as e:
             print(f"❌ Error loading seasonal data: {e}")
     
+    def _load_festival_calendar(self, festival_csv_path: str):
+        """Load the optional festival calendar."""
+        if not os.path.exists(festival_csv_path):
+            print(f"⚠️  Festival data file not found: {festival_csv_path}")
+            return
+        try:
+            self.festival_calendar = FestivalCalendar(festival_csv_path)
+            self.festival_csv_fingerprint = catalog_fingerprint(festival_csv_path)
+        except Exception as e:
+            print(f"❌ Error loading festival calendar: {e}")
+            self.festival_calendar = None
+    
+    def _build_month_index(self):
+        """Compile the CSV into month -> rows, month -> season and ranked recommendation lists."""
+        self.month_rows = {}
+        for row, (product, month, season) in enumerate(zip(self.seasonal_data['Product'],
+                                                           self.seasonal_data['Month'],
+                                                           self.seasonal_data['Season'])):
+            if not isinstance(month, str):
+                continue
+            self.month_rows.setdefault(month.lower(), []).append({
+                'product': product,
+                'month': month,
+                'season': season,
+                'row': row
+            })
+        
+        self.month_season = {key: rows[0]['season'] for key, rows in self.month_rows.items()}
+        
+        self.month_recommendations = {}
+        for key, rows in self.month_rows.items():
+            season = self.month_season[key]
+            recommendations = []
+            for idx, row in enumerate(rows):
+                # Pure seasonal relevance scoring (NO SEARCH QUERY INVOLVED)
+                # 1. Base seasonal score (high for all seasonal products)
+                base_seasonal_score = 0.9
+                
+                # 2. Month-specific boost (exact month match)
+                month_boost = 0.05  # Small boost for being in the exact month
+                
+                # 3. Position-based boost (earlier entries in CSV get slight priority)
+                position_boost = max(0, (len(rows) - idx) / len(rows) * 0.05)
+                
+                final_score = min(base_seasonal_score + month_boost + position_boost, 1.0)
+                
+                recommendations.append({
+                    'product': row['product'],
+                    'month': row['month'],
+                    'season': row['season'],
+                    'similarity_score': final_score,
+                    'csv_position': idx + 1,  # Track position in CSV
+                    'rank': idx + 1,
+                    'match_percentage': f"Seasonal {season}"
+                })
+            
+            # Sort by seasonal relevance score (highest first)
+            recommendations.sort(key=lambda x: x['similarity_score'], reverse=True)
+            self.month_recommendations[key] = recommendations
+    
+    def get_term_embeddings(self, terms: List[str]) -> np.ndarray:
+        """
+        Normalized embeddings for seasonal terms, taken from the precomputed matrix.
+        Terms that are not seasonal products are encoded on the fly.
+        
+        Args:
+            terms: Seasonal product names
+            
+        Returns:
+            Array of shape (len(terms), dim)
+        """
+        rows = [self.product_rows.get(term) for term in terms]
+        missing = [term for term, row in zip(terms, rows) if row is None]
+        encoded = iter(())
+        if missing:
+            extra = np.asarray(self.model.encode(missing), dtype=np.float32)
+            norms = np.linalg.norm(extra, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            encoded = iter(extra / norms)
+        return np.array([self.normalized_embeddings[row] if row is not None else next(encoded)
+                         for row in rows], dtype=np.float32).reshape(len(terms), -1)
+    
+    def match_terms_to_catalog(self,
+                               terms: List[str],
+                               catalog_embeddings: np.ndarray,
+                               valid_mask: np.ndarray,
+                               product_ids: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Pick the best catalog product for each term, never reusing a product id.
+        All terms are scored against the catalog in one matrix multiply; invalid
+        and already-used products are masked out with NumPy.
+        
+        Args:
+            terms: Seasonal terms in priority order
+            catalog_embeddings: Normalized catalog embedding matrix
+            valid_mask: Boolean mask of products eligible for recommendation
+            product_ids: Product id per catalog row (duplicates are excluded together)
+            
+        Returns:
+            List of {'term', 'term_rank', 'index', 'score'} for the terms that found a product
+        """
+        if not terms or len(catalog_embeddings) == 0:
+            return []
+        
+        scores = self.get_term_embeddings(terms) @ np.asarray(catalog_embeddings).T
+        scores[:, ~np.asarray(valid_mask, dtype=bool)] = -np.inf
+        
+        matches = []
+        for t, term in enumerate(terms):
+            best_index = int(np.argmax(scores[t]))
+            best_score = float(scores[t, best_index])
+            if best_score <= -1:
+                continue
+            matches.append({'term': term, 'term_rank': t, 'index': best_index, 'score': best_score})
+            scores[:, product_ids == product_ids[best_index]] = -np.inf
+        
+        return matches
+    
+    def precompute_catalog_picks(self,
+                                 catalog_embeddings: np.ndarray,
+                                 valid_mask: np.ndarray,
+                                 product_ids: np.ndarray,
+                                 catalog_fingerprint: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Match every seasonal term of every month to the catalog.
+        Recommendations don't depend on the user query, so this runs once per
+        catalog/CSV version instead of on each request.
+        
+        Args:
+            catalog_embeddings: Normalized catalog embedding matrix
+            valid_mask: Boolean mask of products eligible for recommendation
+            product_ids: Product id per catalog row
+            catalog_fingerprint: Fingerprint of the catalog the picks are computed for
+            
+        Returns:
+            Dict of lowercase month -> {'search_terms', 'matches'} (all terms, in rank order)
+        """
+        picks = {}
+        for key, recommendations in self.month_recommendations.items():
+            terms = [rec['product'] for rec in recommendations]
+            matches = self.match_terms_to_catalog(terms, catalog_embeddings, valid_mask, product_ids)
+            for match in matches:
+                match['id'] = str(product_ids[match['index']])
+            picks[key] = {'search_terms': terms, 'matches': matches}
+        
+        festival_picks = {}
+        if self.festival_calendar is not None:
+            for festival in self.festival_calendar.festivals:
+                festival_picks[festival] = self.match_festival_to_catalog(
+                    festival, catalog_embeddings, valid_mask, product_ids)
+        
+        self.catalog_picks = CatalogPicks(catalog_fingerprint, picks, festival_picks)
+        print(f"✅ Precomputed seasonal catalog picks for {len(picks)} months and {len(festival_picks)} festivals")
+        return picks
+    
+    def match_festival_to_catalog(self,
+                                  festival: str,
+                                  catalog_embeddings: np.ndarray,
+                                  valid_mask: np.ndarray,
+                                  product_ids: np.ndarray) -> List[Dict[str, Any]]:
+        """Best catalog product for each of a festival's products (see match_terms_to_catalog)."""
+        terms = self.festival_calendar.products_for(festival) if self.festival_calendar is not None else []
+        matches = self.match_terms_to_catalog(terms, catalog_embeddings, valid_mask, product_ids)
+        for match in matches:
+            match['id'] = str(product_ids[match['index']])
+            match['festival'] = festival
+        return matches
+    
+    def save_catalog_picks(self, path: str):
+        """Persist the precomputed picks with the fingerprints they were built from."""
+        catalog_picks = self.catalog_picks
+        if catalog_picks is None:
+            return
+        payload = {
+            'catalog_fingerprint': catalog_picks.fingerprint,
+            'csv_fingerprint': self.csv_fingerprint,
+            'festival_csv_fingerprint': self.festival_csv_fingerprint,
+            'generated_at': datetime.now().isoformat(),
+            'months': catalog_picks.months,
+            'festivals': catalog_picks.festivals
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    
+    def load_catalog_picks(self, path: str, catalog_fingerprint: str) -> bool:
+        """
+        Load persisted picks if they match the given catalog and the loaded CSV.
+        
+        Returns:
+            True if the picks were loaded, False if missing or stale
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read seasonal picks {path}: {e}")
+            return False
+        if payload.get('catalog_fingerprint') != catalog_fingerprint or \
+                payload.get('csv_fingerprint') != self.csv_fingerprint or \
+                payload.get('festival_csv_fingerprint') != self.festival_csv_fingerprint:
+            return False
+        
+        months = payload.get('months', {})
+        self.catalog_picks = CatalogPicks(catalog_fingerprint, months, payload.get('festivals', {}))
+        print(f"✅ Loaded seasonal catalog picks for {len(months)} months from {path}")
+        return True
+    
+    def prepare_catalog_picks(self,
+                              catalog_embeddings: np.ndarray,
+                              valid_mask: np.ndarray,
+                              product_ids: np.ndarray,
+                              catalog_fingerprint: str,
+                              path: str):
+        """
+        Make picks available for a catalog: reuse the persisted file when the catalog
+        and CSVs are unchanged, otherwise recompute and rewrite it.
+        
+        Args:
+            catalog_embeddings: Normalized catalog embedding matrix
+            valid_mask: Boolean mask of products eligible for recommendation
+            product_ids: Product id per catalog row
+            catalog_fingerprint: Fingerprint of the catalog
+            path: Picks file stored alongside the catalog
+        """
+        if self.seasonal_data is None or not catalog_fingerprint:
+            return
+        catalog_picks = self.catalog_picks
+        if catalog_picks is not None and catalog_picks.fingerprint == catalog_fingerprint:
+            return
+        if self.load_catalog_picks(path, catalog_fingerprint):
+            return
+        
+        self.precompute_catalog_picks(catalog_embeddings, valid_mask, product_ids, catalog_fingerprint)
+        try:
+            self.save_catalog_picks(path)
+            print(f"✅ Saved seasonal catalog picks to {path}")
+        except OSError as e:
+            print(f"⚠️  Could not save seasonal picks {path}: {e}")
+    
+    def get_catalog_picks(self,
+                          month: Optional[str],
+                          catalog_fingerprint: str,
+                          num_terms: int = SEASONAL_SEARCH_TERMS) -> Optional[Dict[str, Any]]:
+        """
+        Precomputed seasonal terms and catalog matches for a month.
+        
+        Args:
+            month: Month name (if None, uses current month)
+            catalog_fingerprint: Fingerprint of the catalog the caller is serving
+            num_terms: Number of top seasonal terms to use
+            
+        Returns:
+            Dict with 'search_terms' and 'matches', or None if no picks exist for this catalog
+        """
+        catalog_picks = self.catalog_picks
+        if catalog_picks is None or catalog_picks.fingerprint != catalog_fingerprint:
+            return None
+        
+        if month is None:
+            month = self.get_current_month_name()
+        
+        picks = catalog_picks.months.get(month.lower(), {'search_terms': [], 'matches': []})
+        return {
+            'search_terms': picks['search_terms'][:num_terms],
+            'matches': [m for m in picks['matches'] if m['term_rank'] < num_terms]
+        }
+    
+    def get_active_festivals(self, month: Optional[str] = None, day: Optional[date] = None) -> List[str]:
+        """
+        Festivals to boost: those of an explicitly requested month, otherwise
+        those whose date range contains the given day (today by default).
+        
+        Args:
+            month: Month name requested by the caller, if any
+            day: Date to look up when no month is given
+            
+        Returns:
+            Festival names, most specific first
+        """
+        if self.festival_calendar is None:
+            return []
+        if month:
+            return self.festival_calendar.festivals_for_month(month)
+        return self.festival_calendar.festivals_on(day or date.today())
+    
+    def get_festival_picks(self,
+                           festivals: List[str],
+                           catalog_fingerprint: str,
+                           limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Precomputed catalog matches for the given festivals, interleaved one product
+        per festival at a time and de-duplicated by product id.
+        
+        Args:
+            festivals: Active festival names, in priority order
+            catalog_fingerprint: Fingerprint of the catalog the caller is serving
+            limit: Maximum number of matches to return
+            
+        Returns:
+            List of matches (with a 'festival' key), or None if no picks exist for this catalog
+        """
+        catalog_picks = self.catalog_picks
+        if catalog_picks is None or catalog_picks.fingerprint != catalog_fingerprint:
+            return None
+        return interleave_festival_matches([catalog_picks.festivals.get(f, []) for f in festivals], limit)
+    
     def get_current_month_name(self) -> str:
         """Get the current month name."""
         return datetime.now().strftime("%B")
@@ -60,12 +510,7 @@ class SeasonalRecommendationSystem:
         if month is None:
             month = self.get_current_month_name()
         
-        # Filter products for the given month
-        month_products = self.seasonal_data[
-            self.seasonal_data['Month'].str.lower() == month.lower()
-        ]['Product'].tolist()
-        
-        return month_products
+        return [row['product'] for row in self.month_rows.get(month.lower(), [])]
     
     def get_semantic_seasonal_recommendations(self, 
                                             search_query: str, 
@@ -89,52 +534,10 @@ class SeasonalRecommendationSystem:
         if month is None:
             month = self.get_current_month_name()
         
-        # Get products for the current month
-        month_mask = self.seasonal_data['Month'].str.lower() == month.lower()
-        month_products = self.seasonal_data[month_mask]
-        
-        if month_products.empty:
-            return []
+        # Precomputed ranking for the month (pure seasonal, no search query influence)
+        recommendations = self.month_recommendations.get(month.lower(), [])
         
-        # Pure seasonal recommendations - no search query influence
-        season = self.get_season_for_month(month)
-        
-        # Create recommendations with seasonal priority scoring
-        recommendations = []
-        for idx, (orig_idx, product_row) in enumerate(month_products.iterrows()):
-            product_name = product_row['Product'].lower()
-            
-            # Pure seasonal relevance scoring (NO SEARCH QUERY INFLUENCE)
-            # 1. Base seasonal score (high for all seasonal products)
-            base_seasonal_score = 0.9
-            
-            # 2. Month-specific boost (exact month match)
-            month_boost = 0.05  # Small boost for being in the exact month
-            
-            # 3. Position-based boost (earlier entries in CSV get slight priority)
-            position_boost = max(0, (len(month_products) - idx) / len(month_products) * 0.05)
-            
-            # Calculate final seasonal score (NO SEARCH QUERY INVOLVED)
-            final_score = base_seasonal_score + month_boost + position_boost
-            final_score = min(final_score, 1.0)  # Cap at 1.0
-            
-            recommendations.append({
-                'product': product_row['Product'],
-                'month': product_row['Month'],
-                'season': product_row['Season'],
-                'similarity_score': final_score,
-                'csv_position': idx + 1,  # Track position in CSV
-                'rank': idx + 1
-            })
-        
-        # Sort by seasonal relevance score (highest first)
-        recommendations.sort(key=lambda x: x['similarity_score'], reverse=True)
-        
-        # Add percentage scores for display
-        for rec in recommendations[:top_k]:
-            rec['match_percentage'] = f"Seasonal {season}"
-        
-        return recommendations[:top_k]
+        return [dict(rec) for rec in recommendations[:top_k]]
     
     def get_popular_seasonal_products(self, 
                                     month: Optional[str] = None, 
@@ -155,21 +558,13 @@ class SeasonalRecommendationSystem:
         if month is None:
             month = self.get_current_month_name()
         
-        # Get products for the current month
-        month_products = self.seasonal_data[
-            self.seasonal_data['Month'].str.lower() == month.lower()
-        ]
-        
-        if month_products.empty:
-            return []
-        
-        # Take a random sample or first N products as "popular"
+        # Take the first N products of the month as "popular"
         popular_products = []
-        for idx, (_, row) in enumerate(month_products.head(top_k).iterrows()):
+        for idx, row in enumerate(self.month_rows.get(month.lower(), [])[:top_k]):
             popular_products.append({
-                'product': row['Product'],
-                'month': row['Month'],
-                'season': row['Season'],
+                'product': row['product'],
+                'month': row['month'],
+                'season': row['season'],
                 'similarity_score': 0.5,  # Default score for popular items
                 'match_percentage': "Popular",
                 'rank': idx + 1,
@@ -225,19 +620,8 @@ class SeasonalRecommendationSystem:
         if month is None:
             month = self.get_current_month_name()
         
-        month_products = self.seasonal_data[
-            self.seasonal_data['Month'].str.lower() == month.lower()
-        ]
-        
-        products = []
-        for _, row in month_products.iterrows():
-            products.append({
-                'product': row['Product'],
-                'month': row['Month'],
-                'season': row['Season']
-            })
-        
-        return products
+        return [{'product': row['product'], 'month': row['month'], 'season': row['season']}
+                for row in self.month_rows.get(month.lower(), [])]
     
     def get_season_for_month(self, month: Optional[str] = None) -> str:
         """
@@ -255,11 +639,48 @@ class SeasonalRecommendationSystem:
         if month is None:
             month = self.get_current_month_name()
         
-        month_data = self.seasonal_data[
-            self.seasonal_data['Month'].str.lower() == month.lower()
-        ]
-        
-        if not month_data.empty:
-            return month_data.iloc[0]['Season']
-        
-        return "Unknown"
+        return self.month_season.get(month.lower(), "Unknown")
+
+
+def interleave_festival_matches(per_festival: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """Round-robin over per-festival match lists, skipping products already taken."""
+    merged = []
+    used_ids = set()
+    for position in range(max((len(m) for m in per_festival), default=0)):
+        for matches in per_festival:
+            if len(merged) >= limit:
+                return merged
+            if position < len(matches) and matches[position]['id'] not in used_ids:
+                used_ids.add(matches[position]['id'])
+                merged.append(matches[position])
+    return merged
+
+
+def seasonal_picks_path(products_file: str) -> str:
+    """Location of the precomputed seasonal picks for a products file."""
+    return os.path.splitext(products_file)[0] + "_seasonal_picks.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute seasonal catalog picks for all months")
+    parser.add_argument("--products", default="unified_products.json")
+    parser.add_argument("--csv", default="Product,Month,Season.csv")
+    parser.add_argument("--force", action="store_true", help="Recompute even if the saved picks are current")
+    args = parser.parse_args()
+
+    from catalog import build_catalog_snapshot
+
+    model = SentenceTransformer('all-MiniLM-L6-v2')
+    snapshot = build_catalog_snapshot(args.products, semantic_model=model)
+    system = SeasonalRecommendationSystem(args.csv, model=model)
+    if args.force:
+        system.precompute_catalog_picks(snapshot.embeddings, snapshot.prices > 0, snapshot.ids,
+                                        snapshot.fingerprint)
+        system.save_catalog_picks(seasonal_picks_path(args.products))
+    else:
+        system.prepare_catalog_picks(snapshot.embeddings, snapshot.prices > 0, snapshot.ids,
+                                     snapshot.fingerprint, seasonal_picks_path(args.products))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Scatter-gather search over a catalog split into N shards.
+Each shard is served by a local worker process that memory-maps its slice of the
+shared catalog export (see catalog.export_shared_catalog), scores it and returns
+its own top-k. The coordinator merges the per-shard results with the same
+ordering rules as the single-process path in ranking.py.
+
+Workers are fresh interpreters running this file, so they import only NumPy and
+ranking and never inherit the API process's threads, locks or models (forking a
+threaded server is unsafe). Each worker listens on a local socket and serves
+every connection on its own thread; a request checks out one connection per
+shard, so concurrent queries run in parallel instead of queueing on one pipe.
+A shard that fails a query, or whose process has died, makes search() return
+None so the caller ranks in-process; dead shards are respawned first.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ranking import rank, merge_ranked
+
+# Seconds to wait for in-flight queries when a searcher is closed
+CLOSE_TIMEOUT = 5.0
+
+
+def _serve_connection(conn, columns, start: int):
+    """Answer queries on one coordinator connection until it is closed."""
+    embeddings, prices, ratings, brands, category_keys = columns
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        try:
+            query, filters, sort_option, k = message
+            began = time.perf_counter()
+            scores = embeddings @ query
+            result = rank(scores, prices, ratings, brands, category_keys, filters, sort_option, k, offset=start)
+            reply = ("ok", result, (time.perf_counter() - began) * 1000)
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        try:
+            conn.send(reply)
+        except OSError:
+            break
+    conn.close()
+
+
+def _shard_worker(export_path: str, start: int, stop: int):
+    """
+    Worker entry point: attach to the shard's slice, report the listening address
+    on stdout and serve connections until the coordinator's stdin pipe closes.
+    """
+    authkey = bytes.fromhex(sys.stdin.readline().strip())
+
+    def column(name):
+        return np.load(os.path.join(export_path, f"{name}.npy"), mmap_mode="r")[start:stop]
+
+    columns = tuple(column(name) for name in ("embeddings", "prices", "ratings", "brands", "category_keys"))
+    listener = Listener(authkey=authkey)
+
+    def watch_parent():
+        # EOF on stdin means the coordinator exited or closed this shard
+        sys.stdin.read()
+        address = listener.address
+        listener.close()
+        if isinstance(address, str) and os.path.isabs(address):
+            # os._exit skips multiprocessing's cleanup of the socket's temp dir
+            shutil.rmtree(os.path.dirname(address), ignore_errors=True)
+        os._exit(0)
+
+    threading.Thread(target=watch_parent, daemon=True).start()
+    print(listener.address, flush=True)
+
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception:
+            continue  # failed handshake; keep serving
+        threading.Thread(target=_serve_connection, args=(conn, columns, start), daemon=True).start()
+
+
+class ShardedSearcher:
+    """
+    Coordinator owning one worker process per catalog shard.
+    Queries are fanned out to every shard and the partial top-k lists merged.
+    """
+
+    def __init__(self, export_path: str, num_products: int, num_shards: int):
+        self.export_path = export_path
+        self.num_shards = max(1, min(num_shards, max(num_products, 1)))
+        self.bounds = np.linspace(0, num_products, self.num_shards + 1).astype(int)
+        self._authkey = os.urandom(32)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._closed = False
+        self._in_flight = 0
+        # Connection sets (one connection per shard) not currently used by a request
+        self._pool: List[List] = []
+        self._processes = [None] * self.num_shards
+        self._addresses = [None] * self.num_shards
+
+        for shard in range(self.num_shards):
+            self._start(shard)
+        print(f"✅ Started {self.num_shards} search shards over {num_products} products")
+
+    def _start(self, shard: int):
+        """Launch a shard worker and wait until it is listening."""
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), self.export_path,
+             str(int(self.bounds[shard])), str(int(self.bounds[shard + 1]))],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        process.stdin.write(self._authkey.hex() + "\n")
+        process.stdin.flush()
+        address = process.stdout.readline().strip()
+        if not address:
+            process.kill()
+            process.wait()
+            raise RuntimeError(f"search shard {shard} exited during startup")
+        self._processes[shard] = process
+        self._addresses[shard] = address
+
+    def _stop(self, process):
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=CLOSE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def _respawn_dead(self):
+        """Restart shard workers that have exited (caller holds the lock)."""
+        dead = [shard for shard, process in enumerate(self._processes)
+                if process is None or process.poll() is not None]
+        if not dead:
+            return
+        # Pooled connections to a dead worker are unusable
+        for conns in self._pool:
+            self._close_connections(conns)
+        self._pool = []
+        for shard in dead:
+            print(f"⚠️ Search shard {shard} died, restarting it")
+            self._processes[shard] = None
+            try:
+                self._start(shard)
+                print(f"✅ Restarted search shard {shard}")
+            except (RuntimeError, OSError) as e:
+                print(f"⚠️ Could not restart search shard {shard}: {e}")
+
+    def _checkout(self) -> Optional[List]:
+        with self._lock:
+            if self._closed:
+                return None
+            self._in_flight += 1
+            if self._pool:
+                return self._pool.pop()
+            addresses = list(self._addresses)
+        conns = []
+        try:
+            for address in addresses:
+                conns.append(Client(address, authkey=self._authkey))
+        except (OSError, EOFError, ValueError) as e:
+            print(f"⚠️ Could not connect to search shards: {e}")
+            self._close_connections(conns)
+            self._checkin(None)
+            return None
+        return conns
+
+    def _checkin(self, conns: Optional[List]):
+        with self._lock:
+            self._in_flight -= 1
+            if conns is not None and not self._closed:
+                self._pool.append(conns)
+            elif conns is not None:
+                self._close_connections(conns)
+            if conns is None and not self._closed:
+                self._respawn_dead()
+            self._idle.notify_all()
+
+    @staticmethod
+    def _close_connections(conns: List):
+        for conn in conns:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def search(self, query_embedding: np.ndarray, filters: Dict, sort_option: str,
+               k: int = 20) -> Optional[Dict]:
+        """
+        Scatter a normalized query embedding to all shards and gather the global top k.
+        Safe to call from several threads at once.
+
+        Returns:
+            Dict with indices, scores, total and per-shard latencies, or None if closed
+            or any shard failed (the caller then ranks in-process)
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        conns = self._checkout()
+        if conns is None:
+            return None
+        began = time.perf_counter()
+        try:
+            for conn in conns:
+                conn.send((query, filters, sort_option, k))
+            replies = [conn.recv() for conn in conns]
+        except (EOFError, OSError):
+            # A worker died mid-query: drop this connection set and restart it
+            self._close_connections(conns)
+            self._checkin(None)
+            return None
+        self._checkin(conns)
+
+        failed = [(shard, reply[1]) for shard, reply in enumerate(replies) if reply[0] != "ok"]
+        for shard, error in failed:
+            print(f"⚠️ Search shard {shard} failed: {error}")
+        if failed:
+            return None
+        indices, scores, total = merge_ranked([reply[1] for reply in replies], k)
+
+        return {
+            "indices": indices,
+            "scores": scores,
+            "total": total,
+            "shard_latencies_ms": [round(reply[2], 3) for reply in replies],
+            "shard_sizes": np.diff(self.bounds).tolist(),
+            "total_ms": round((time.perf_counter() - began) * 1000, 3),
+        }
+
+    def close(self):
+        """Stop the workers; waits (briefly) for in-flight queries to finish first."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._idle.wait_for(lambda: self._in_flight == 0, timeout=CLOSE_TIMEOUT)
+            for conns in self._pool:
+                self._close_connections(conns)
+            self._pool = []
+            processes = list(self._processes)
+        for process in processes:
+            self._stop(process)
+
+
+if __name__ == "__main__":
+    _shard_worker(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Batch spell correction for offline query-log cleaning.
+Queries are read in blocks. Within a block, duplicate queries are corrected once
+and the unique tokens are checked against the vocabulary once, so queries made
+only of known words never leave the parent process. From the command line the
+remaining queries are spread over a fork-based process pool created once at
+startup: workers inherit the parent's corrector (vocabulary, indexes and n-gram
+tables) copy-on-write instead of each loading their own. The API corrects
+in-process, since forking a threaded server per request is unsafe. Results come
+back in input order as NDJSON lines.
+
+Usage:
+    python spell_batch.py --input queries.txt --output corrected.ndjson --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List
+
+from ecommerce_spell_correction import EcommerceSpellCorrector, tokenize_text
+
+BATCH_BLOCK_SIZE = 20000
+BATCH_CHUNK_SIZE = 256
+
+# Set by the pool initializer in each worker process; never assigned in the parent
+_worker_corrector = None
+
+
+def _init_worker(corrector: EcommerceSpellCorrector):
+    global _worker_corrector
+    _worker_corrector = corrector
+
+
+def _correct_chunk(queries: List[str]) -> List[Dict]:
+    return [_worker_corrector.correct_query(query) for query in queries]
+
+
+def _blocks(queries: Iterable[str], size: int) -> Iterator[List[str]]:
+    block = []
+    for query in queries:
+        block.append(query)
+        if len(block) >= size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def fork_available() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def create_pool(corrector: EcommerceSpellCorrector, workers: int):
+    """
+    Fork a process pool whose workers share the corrector copy-on-write.
+    Meant to be created once per process (the batch CLI), not per request.
+
+    Args:
+        corrector: Fully built spell corrector handed to every worker
+        workers: Number of worker processes
+
+    Returns:
+        multiprocessing Pool, or None if workers <= 1 or fork is unavailable
+    """
+    if workers <= 1:
+        return None
+    if not fork_available():
+        print("⚠️ fork start method not available, correcting in-process", file=sys.stderr)
+        return None
+    # With fork the initializer arguments are inherited by the children, not pickled
+    return multiprocessing.get_context("fork").Pool(workers, initializer=_init_worker, initargs=(corrector,))
+
+
+def iter_corrections(corrector: EcommerceSpellCorrector,
+                     queries: Iterable[str],
+                     pool=None,
+                     block_size: int = BATCH_BLOCK_SIZE,
+                     chunk_size: int = BATCH_CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Correct a stream of queries, yielding one result per query in input order.
+
+    Args:
+        corrector: Spell corrector used for the in-process part of the work
+        queries: Iterable of raw query strings
+        pool: Pool from create_pool built around the same corrector (None corrects in-process)
+        block_size: Queries deduplicated and dispatched together
+        chunk_size: Queries sent to a worker per task
+
+    Returns:
+        Iterator of correct_query results, each with its input 'index'
+    """
+    index = 0
+    for block in _blocks(queries, block_size):
+        unique = list(dict.fromkeys(query.strip() for query in block))
+
+        query_tokens = {query: tokenize_text(query) for query in unique}
+        unknown = set().union(*query_tokens.values()) - corrector.vocabulary
+        pending = [query for query in unique if not unknown.isdisjoint(query_tokens[query])]
+        # All-known queries take the corrector's fast path; not worth a round trip to a worker
+        resolved = {query: corrector.correct_query(query) for query in unique
+                    if unknown.isdisjoint(query_tokens[query])}
+
+        if pool is not None and pending:
+            chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+            results = [result for chunk in pool.imap(_correct_chunk, chunks) for result in chunk]
+        else:
+            results = [corrector.correct_query(query) for query in pending]
+        resolved.update(zip(pending, results))
+
+        for query in block:
+            yield {"index": index, **resolved[query.strip()]}
+            index += 1
+
+
+def iter_ndjson(results: Iterable[Dict]) -> Iterator[str]:
+    """Serialize results as newline-delimited JSON."""
+    for result in results:
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spell-correct a query log and write NDJSON")
+    parser.add_argument("--input", default="-", help="One query per line ('-' for stdin)")
+    parser.add_argument("--output", default="-", help="NDJSON output file ('-' for stdout)")
+    parser.add_argument("--products", default="unified_products.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--block-size", type=int, default=BATCH_BLOCK_SIZE)
+    args = parser.parse_args()
+
+    corrector = EcommerceSpellCorrector(args.products)
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    pool = create_pool(corrector, args.workers)
+    began = time.perf_counter()
+    total = corrected = 0
+    try:
+        queries = (line.rstrip("\n") for line in source)
+        for result in iter_corrections(corrector, queries, pool, args.block_size):
+            sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+            total += 1
+            corrected += result["corrections_made"]
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - began
+    print(f"✅ Corrected {corrected}/{total} queries in {elapsed:.1f}s "
+          f"({total / max(elapsed, 1e-9):.0f} queries/s, {args.workers} workers)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 from symspellpy.symspellpy import SymSpell, Verbosity
-import pkg_resources
 import os
 
 # Set up SymSpell instance
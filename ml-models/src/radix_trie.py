@@ -0,0 +1,474 @@
+# src/radix_trie.py
+"""
+Memory-compact radix (Patricia) trie for autocomplete.
+Phrases are collected by insert() and frozen by build() into flat arrays: one
+entry per node for its edge label (a slice of the concatenated normalized keys),
+its children (stored contiguously, so a node only records the first child and
+the count) and the range of sorted phrase ids below it. Nodes whose subtree
+holds more than top_k phrases also keep their precomputed top-k completions.
+No per-node Python objects or dicts survive the build.
+
+save() writes the arrays to one flat file; load() memory-maps it and queries the
+arrays in place, so reloading is instant and every process opening the same file
+shares its pages.
+
+Compare against src/trie.py with
+`python -m src.radix_trie --products unified_products.json`, or write the
+catalog's index ahead of startup with `--build`.
+
+fuzzy_search_prefix() tolerates typos in the prefix: it walks the trie with a
+bounded Levenshtein automaton (a banded edit-distance row per byte, with
+transpositions) and prunes every branch whose row has no cell within the bound.
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import deque
+
+DEFAULT_TOP_K = 10
+
+# Prefix length (bytes) from which 1 and 2 edits are tolerated by fuzzy_search_prefix
+FUZZY_MIN_LENGTH = {1: 4, 2: 8}
+
+INDEX_MAGIC = b"RDXTRIE1"
+_TEXT_FIELDS = ("keys_text", "phrases_text")
+_ARRAY_FIELDS = ("key_offsets", "phrase_offsets", "weights", "label_start", "label_len", "first_byte",
+                 "first_child", "child_count", "range_lo", "range_hi", "top_start", "top_len", "top_ids")
+
+
+class RadixTrie:
+    """Array-backed compressed trie with the same insert/search_prefix API as Trie."""
+
+    def __init__(self, top_k=DEFAULT_TOP_K):
+        self.top_k = top_k
+        # normalized key -> (weight, phrase), only until build()
+        self._pending = {}
+        self._dirty = False
+        # Open memory map when the arrays come from load(); dropped once rebuilt
+        self._clear_arrays()
+
+    def _clear_arrays(self):
+        self._mmap = None
+        self.keys_text = b""
+        self.key_offsets = array("q", [0])
+        self.phrases_text = b""
+        self.phrase_offsets = array("q", [0])
+        self.weights = array("d")
+        self.label_start = array("q")
+        self.label_len = array("i")
+        self.first_byte = array("B")
+        self.first_child = array("i")
+        self.child_count = array("i")
+        self.range_lo = array("i")
+        self.range_hi = array("i")
+        self.top_start = array("q")
+        self.top_len = array("i")
+        self.top_ids = array("i")
+
+    def __len__(self):
+        return len(self._pending) if self._dirty else len(self.weights)
+
+    @property
+    def node_count(self):
+        return len(self.range_lo)
+
+    @property
+    def nbytes(self):
+        arrays = [getattr(self, name) for name in _ARRAY_FIELDS]
+        return len(self.keys_text) + len(self.phrases_text) + sum(a.itemsize * len(a) for a in arrays)
+
+    def insert(self, phrase, weight=1.0):
+        """Add a phrase; inserting an existing phrase keeps the larger weight."""
+        self._thaw()
+        key = phrase.strip().lower()
+        existing = self._pending.get(key)
+        if existing is None or weight > existing[0]:
+            self._pending[key] = (weight, phrase.strip())
+            self._dirty = True
+
+    def update_weights(self, weights):
+        """Replace the weights of existing phrases in bulk (phrase -> weight); unknown phrases are ignored."""
+        self._thaw()
+        for phrase, weight in weights.items():
+            key = phrase.strip().lower()
+            if key in self._pending:
+                self._pending[key] = (weight, self._pending[key][1])
+                self._dirty = True
+        self.build()
+
+    def _thaw(self):
+        """Recover the phrase table from the arrays so a built trie can be modified again."""
+        if self._pending or not len(self.weights):
+            return
+        for i in range(len(self.weights)):
+            key = str(self.keys_text[self.key_offsets[i]:self.key_offsets[i + 1]], "utf-8")
+            self._pending[key] = (self.weights[i], self.phrase(i))
+
+    def phrase(self, i):
+        # str() rather than .decode() so this also works on memoryviews of a loaded index
+        return str(self.phrases_text[self.phrase_offsets[i]:self.phrase_offsets[i + 1]], "utf-8")
+
+    def build(self):
+        """Freeze the inserted phrases into the flat node arrays."""
+        if not self._dirty:
+            return
+        entries = sorted((key.encode("utf-8"), weight, phrase)
+                         for key, (weight, phrase) in self._pending.items())
+        self._clear_arrays()
+        keys = [e[0] for e in entries]
+        phrases = [e[2] for e in entries]
+        self.keys_text = b"".join(keys)
+        self.phrases_text = "".join(phrases).encode("utf-8")
+        for key, weight, phrase in entries:
+            self.key_offsets.append(self.key_offsets[-1] + len(key))
+            self.phrase_offsets.append(self.phrase_offsets[-1] + len(phrase.encode("utf-8")))
+            self.weights.append(weight)
+
+        # Breadth-first, so the children of each node get consecutive ids
+        depths = []
+        self._add_node(0, 0, 0, len(keys))
+        depths.append(0)
+        queue = deque([0])
+        while queue:
+            node = queue.popleft()
+            lo, hi, depth = self.range_lo[node], self.range_hi[node], depths[node]
+            i = lo + 1 if lo < hi and len(keys[lo]) == depth else lo
+            self.first_child[node] = self.node_count
+            while i < hi:
+                group_prefix = keys[i][:depth + 1]
+                j = bisect.bisect_left(keys, _prefix_successor(group_prefix), i, hi) \
+                    if group_prefix[-1] < 255 else hi
+                common = len(os.path.commonprefix([keys[i], keys[j - 1]]))
+                child = self._add_node(self.key_offsets[i] + depth, common - depth, i, j)
+                depths.append(common)
+                queue.append(child)
+                self.child_count[node] += 1
+                i = j
+
+        self._build_top_lists(keys, depths, phrases)
+        self._pending = {}
+        self._dirty = False
+
+    def _add_node(self, label_start, label_len, lo, hi):
+        self.label_start.append(label_start)
+        self.label_len.append(label_len)
+        self.first_byte.append(self.keys_text[label_start] if label_len else 0)
+        self.first_child.append(0)
+        self.child_count.append(0)
+        self.range_lo.append(lo)
+        self.range_hi.append(hi)
+        return len(self.range_lo) - 1
+
+    def _build_top_lists(self, keys, depths, phrases):
+        """Top-k per large node, merged bottom-up from the children's lists."""
+        k = self.top_k
+        tops = {}
+        for node in range(self.node_count - 1, -1, -1):
+            lo, hi = self.range_lo[node], self.range_hi[node]
+            if hi - lo <= k:
+                continue
+            candidates = [lo] if len(keys[lo]) == depths[node] else []
+            first = self.first_child[node]
+            for child in range(first, first + self.child_count[node]):
+                candidates.extend(tops.get(child) or range(self.range_lo[child], self.range_hi[child]))
+            tops[node] = heapq.nsmallest(k, candidates, key=lambda i: (-self.weights[i], phrases[i]))
+
+        self.top_start = array("q", [0] * self.node_count)
+        self.top_len = array("i", [0] * self.node_count)
+        for node in sorted(tops):
+            self.top_start[node] = len(self.top_ids)
+            self.top_len[node] = len(tops[node])
+            self.top_ids.extend(tops[node])
+
+    def save(self, path, fingerprint=None):
+        """
+        Write the built arrays to one file (atomically): magic, header length, JSON
+        header with the section table, then each section aligned to 8 bytes.
+        """
+        self.build()
+        sections = {}
+        blobs = []
+        offset = 0
+        for name in _TEXT_FIELDS + _ARRAY_FIELDS:
+            value = getattr(self, name)
+            blob = bytes(value) if name in _TEXT_FIELDS else value.tobytes()
+            code = "B" if name in _TEXT_FIELDS else value.typecode
+            sections[name] = [code, offset, len(blob)]
+            blobs.append(blob)
+            offset += _aligned(len(blob))
+        header = json.dumps({"fingerprint": fingerprint, "top_k": self.top_k,
+                             "byteorder": sys.byteorder, "sections": sections}).encode("utf-8")
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+            for blob in blobs:
+                f.write(blob)
+                f.write(b"\0" * (_aligned(len(blob)) - len(blob)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, fingerprint=None):
+        """
+        Memory-map an index written by save().
+
+        Returns:
+            A read-only-backed RadixTrie, or None if the file is missing, malformed,
+            or was built for a different catalog fingerprint
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < len(INDEX_MAGIC) + 8:
+                return None
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            mm.close()
+            return None
+        header_start = len(INDEX_MAGIC) + 8
+        try:
+            header_len = struct.unpack_from("<Q", mm, len(INDEX_MAGIC))[0]
+            header = json.loads(mm[header_start:header_start + header_len].decode("utf-8"))
+            data_start = _aligned(header_start + header_len)
+            valid = (fingerprint is None or header["fingerprint"] == fingerprint) and \
+                header["byteorder"] == sys.byteorder
+            # Truncated or inconsistent sections would otherwise fail later, mid-lookup
+            for name, (code, offset, size) in header["sections"].items():
+                if offset < 0 or size < 0 or data_start + offset + size > len(mm) or \
+                        (name not in _TEXT_FIELDS and size % struct.calcsize(code)):
+                    valid = False
+            trie = cls(header["top_k"]) if valid else None
+        except (ValueError, KeyError, TypeError, struct.error):
+            trie = None
+        if trie is None:
+            mm.close()
+            return None
+
+        view = memoryview(mm)
+        for name, (code, offset, size) in header["sections"].items():
+            section = view[data_start + offset:data_start + offset + size]
+            setattr(trie, name, section if name in _TEXT_FIELDS else section.cast(code))
+        trie._mmap = mm
+        return trie
+
+    def _find(self, prefix_bytes):
+        """Node whose subtree holds exactly the keys starting with prefix_bytes, or None."""
+        node, pos, size = 0, 0, len(prefix_bytes)
+        while pos < size:
+            first = self.first_child[node]
+            byte = prefix_bytes[pos]
+            for child in range(first, first + self.child_count[node]):
+                if self.first_byte[child] == byte:
+                    break
+            else:
+                return None
+            start, length = self.label_start[child], self.label_len[child]
+            matched = min(length, size - pos)
+            if self.keys_text[start:start + matched] != prefix_bytes[pos:pos + matched]:
+                return None
+            node, pos = child, pos + matched
+        return node
+
+    def _top_ids(self, node, limit):
+        """Ids of the best phrases under a node, best first."""
+        if limit <= self.top_len[node]:
+            start = self.top_start[node]
+            return list(self.top_ids[start:start + limit])
+        ids = range(self.range_lo[node], self.range_hi[node])
+        return heapq.nsmallest(limit, ids, key=lambda i: (-self.weights[i], self.phrase(i)))
+
+    def search_prefix(self, prefix, max_results=10):
+        """Highest-weight phrases starting with prefix, best first."""
+        self.build()
+        if not self.node_count:
+            return []
+        node = self._find(prefix.strip().lower().encode("utf-8"))
+        if node is None:
+            return []
+        return [self.phrase(i) for i in self._top_ids(node, max_results)]
+
+    def fuzzy_search_prefix(self, prefix, max_results=10, max_distance=None):
+        """
+        Completions of prefix allowing for typos: exact-prefix matches first (by
+        weight), then phrases whose beginning is within max_distance edits of the
+        prefix, by distance and then weight.
+
+        Args:
+            prefix: Typed prefix
+            max_results: Number of suggestions to return
+            max_distance: Edit bound (0-2); by default 1 from 4 bytes and 2 from 8 bytes
+
+        Returns:
+            List of phrases, best first
+        """
+        self.build()
+        if not self.node_count:
+            return []
+        query = prefix.strip().lower().encode("utf-8")
+        if max_distance is None:
+            max_distance = max([d for d, length in FUZZY_MIN_LENGTH.items() if len(query) >= length], default=0)
+
+        exact_node = self._find(query)
+        exact = self._top_ids(exact_node, max_results) if exact_node is not None else []
+        if max_distance == 0 or len(exact) >= max_results:
+            return [self.phrase(i) for i in exact]
+
+        seen = set(exact)
+        if exact_node is not None:
+            exact_range = (self.range_lo[exact_node], self.range_hi[exact_node])
+        else:
+            exact_range = (0, 0)
+        ranked = {}
+        for node, distance in self._fuzzy_nodes(query, max_distance):
+            for i in self._top_ids(node, max_results):
+                if i in seen or exact_range[0] <= i < exact_range[1]:
+                    continue
+                if distance < ranked.get(i, max_distance + 1):
+                    ranked[i] = distance
+        fuzzy = heapq.nsmallest(max_results - len(exact), ranked,
+                                key=lambda i: (ranked[i], -self.weights[i], self.phrase(i)))
+        return [self.phrase(i) for i in exact + fuzzy]
+
+    def _fuzzy_nodes(self, query, max_distance):
+        """
+        (node, distance) for every subtree whose path reaches within max_distance
+        edits of query (optimal string alignment distance, so a swap counts once).
+        """
+        n = len(query)
+        limit = max_distance + 1
+        keys_text, label_start, label_len = self.keys_text, self.label_start, self.label_len
+        first_child, child_count = self.first_child, self.child_count
+
+        matches = []
+        # (node, depth, row, previous row, previous byte); rows are capped at limit
+        stack = [(0, 0, [min(j, limit) for j in range(n + 1)], None, -1)]
+        while stack:
+            node, depth, row, prev_row, prev_byte = stack.pop()
+            first = first_child[node]
+            for child in range(first, first + child_count[node]):
+                r, pr, pb, d = row, prev_row, prev_byte, depth
+                best = limit
+                alive = True
+                start = label_start[child]
+                for byte in keys_text[start:start + label_len[child]]:
+                    d += 1
+                    new = [limit] * (n + 1)
+                    new[0] = min(d, limit)
+                    lo, hi = max(1, d - max_distance), min(n, d + max_distance)
+                    for j in range(lo, hi + 1):
+                        q = query[j - 1]
+                        v = r[j - 1] + (q != byte)
+                        if r[j] + 1 < v:
+                            v = r[j] + 1
+                        if new[j - 1] + 1 < v:
+                            v = new[j - 1] + 1
+                        if pr is not None and j > 1 and q == pb and query[j - 2] == byte and pr[j - 2] + 1 < v:
+                            v = pr[j - 2] + 1
+                        new[j] = v if v < limit else limit
+                    pr, r, pb = r, new, byte
+                    if r[n] < best:
+                        best = r[n]
+                    if min(new) >= limit:
+                        alive = False
+                        break
+                if best < limit:
+                    matches.append((child, best))
+                # Deeper nodes can only help if they could still beat this subtree's distance
+                if alive and min(r) < best:
+                    stack.append((child, d, r, pr, pb))
+        return matches
+
+
+def _with_typo(text, position):
+    """text with the characters at position and position + 1 swapped (benchmark input)."""
+    if position + 1 >= len(text):
+        return text
+    return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+
+
+def _aligned(size):
+    return (size + 7) // 8 * 8
+
+
+def _prefix_successor(prefix):
+    """Smallest byte string greater than every string starting with prefix (last byte < 255)."""
+    return prefix[:-1] + bytes([prefix[-1] + 1])
+
+
+def _measure(build):
+    tracemalloc.start()
+    began = time.perf_counter()
+    trie = build()
+    build_s = time.perf_counter() - began
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return trie, current, peak, build_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory benchmark: RadixTrie vs Trie")
+    parser.add_argument("--products", default="unified_products.json")
+    parser.add_argument("--queries", type=int, default=2000, help="Prefix lookups timed per trie")
+    parser.add_argument("--build", action="store_true", help="Write the catalog's autocomplete index and exit")
+    args = parser.parse_args()
+
+    from catalog import build_suggestion_bank, build_suggestion_weights, prepare_autocomplete_index
+    from src.trie import Trie
+
+    if args.build:
+        prepare_autocomplete_index(args.products, force=True)
+        return
+
+    with open(args.products, "r", encoding="utf-8") as f:
+        products = json.load(f)
+    suggestion_bank = build_suggestion_bank(products)
+    weights = build_suggestion_weights(products)
+    titles = [p.get("title", "").strip() for p in products if p.get("title", "").strip()]
+    del products
+
+    def fill(trie):
+        for phrase in titles + suggestion_bank:
+            trie.insert(phrase, weights[phrase])
+        if isinstance(trie, RadixTrie):
+            trie.build()
+        return trie
+
+    prefixes = [t.lower()[:n] for t in titles[:args.queries] for n in (1, 3, 6)]
+    print(f"\n📊 {len(titles)} titles + {len(suggestion_bank)} category suggestions")
+    results = {}
+    for name, factory in (("Trie", Trie), ("RadixTrie", RadixTrie)):
+        trie, current, peak, build_s = _measure(lambda: fill(factory()))
+        began = time.perf_counter()
+        for prefix in prefixes:
+            results.setdefault(prefix, []).append(trie.search_prefix(prefix))
+        lookup_us = (time.perf_counter() - began) / max(len(prefixes), 1) * 1e6
+        print(f"  {name:10s} memory={current / 2**20:.1f}MB peak={peak / 2**20:.1f}MB "
+              f"build={build_s:.2f}s lookup={lookup_us:.1f}us")
+    mismatches = sum(1 for answers in results.values() if answers[0] != answers[1])
+    print(f"  {'✅' if not mismatches else '⚠️'} {mismatches} of {len(results)} prefixes differ")
+
+    typo_prefixes = [_with_typo(t.lower()[:n], n // 2) for t in titles[:args.queries] for n in (4, 8, 12)]
+    latencies = []
+    for prefix in typo_prefixes:
+        began = time.perf_counter()
+        trie.fuzzy_search_prefix(prefix)
+        latencies.append((time.perf_counter() - began) * 1000)
+    latencies.sort()
+    print(f"  fuzzy      p50={latencies[len(latencies) // 2]:.2f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99)]:.2f}ms over {len(latencies)} typo'd prefixes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,129 @@
 # src/trie.py
 
+from bisect import insort
+
+DEFAULT_TOP_K = 10
+
+
 class TrieNode:
     def __init__(self):
         self.children = {}
         self.is_end_of_word = False
         self.phrase = None
+        self.weight = 0.0
+        # Best completions in this subtree as (-weight, phrase), best first
+        self.top = []
 
 class Trie:
-    def __init__(self):
+    """
+    Prefix trie where every node keeps its top-k completions ranked by weight,
+    so a prefix lookup is a walk down the prefix plus a slice.
+    """
+
+    def __init__(self, top_k=DEFAULT_TOP_K):
         self.root = TrieNode()
+        self.top_k = top_k
 
-    def insert(self, phrase):
-        node = self.root
+    def insert(self, phrase, weight=1.0):
+        """
+        Add a phrase; inserting an existing phrase keeps the larger weight, and on
+        equal weight the latest spelling wins (as before weights existed).
+        """
         phrase_norm = phrase.strip().lower()
+        path = [self.root]
+        node = self.root
         for char in phrase_norm:
             if char not in node.children:
                 node.children[char] = TrieNode()
             node = node.children[char]
+            path.append(node)
+
+        if node.is_end_of_word and node.weight > weight:
+            return
+        replaced = node.phrase if node.is_end_of_word else None
         node.is_end_of_word = True
         node.phrase = phrase.strip()
+        node.weight = weight
 
-    def search_prefix(self, prefix, max_results=10):
+        if replaced is not None and replaced != node.phrase:
+            # Same normalized key under a different spelling: drop the old one everywhere on the path
+            for path_node in reversed(path):
+                self._recompute_top(path_node)
+            return
+        entry = (-weight, node.phrase)
+        for path_node in path:
+            self._offer(path_node, entry)
+
+    def _offer(self, node, entry):
+        """Insert or raise a phrase in a node's top list (weights only grow here)."""
+        top = node.top
+        phrase = entry[1]
+        for i, (_, existing) in enumerate(top):
+            if existing == phrase:
+                del top[i]
+                break
+        else:
+            if len(top) >= self.top_k and entry >= top[-1]:
+                return
+        insort(top, entry)
+        del top[self.top_k:]
+
+    def _recompute_top(self, node):
+        """Rebuild a node's top list from its own phrase and its children's lists."""
+        entries = [entry for child in node.children.values() for entry in child.top]
+        if node.is_end_of_word and node.phrase:
+            entries.append((-node.weight, node.phrase))
+        entries.sort()
+        node.top = entries[:self.top_k]
+
+    def update_weights(self, weights):
+        """
+        Replace the weights of existing phrases in bulk (phrase -> weight) and
+        rebuild every node's top list once; unknown phrases are ignored.
+        """
+        for phrase, weight in weights.items():
+            node = self._find(phrase.strip().lower())
+            if node is not None and node.is_end_of_word:
+                node.weight = weight
+        self.rebuild()
+
+    def rebuild(self):
+        """Recompute all top lists bottom-up (iterative post-order)."""
+        stack = [(self.root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                self._recompute_top(node)
+                continue
+            stack.append((node, True))
+            for child in node.children.values():
+                stack.append((child, False))
+
+    def _find(self, prefix_norm):
         node = self.root
-        results = []
-        prefix_norm = prefix.strip().lower()
         for char in prefix_norm:
-            if char not in node.children:
-                return []
-            node = node.children[char]
-        self._dfs(node, results, max_results)
-        return results
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
 
-    def _dfs(self, node, results, max_results):
-        if len(results) >= max_results:
-            return
-        if node.is_end_of_word and node.phrase:
-            results.append(node.phrase)
-            if len(results) >= max_results:
-                return
-        for child in node.children.values():
-            self._dfs(child, results, max_results)
-            if len(results) >= max_results:
-                break
+    def search_prefix(self, prefix, max_results=10):
+        """Highest-weight phrases starting with prefix, best first."""
+        node = self._find(prefix.strip().lower())
+        if node is None:
+            return []
+        if max_results <= self.top_k:
+            return [phrase for _, phrase in node.top[:max_results]]
+        # More than the precomputed lists hold: rank the whole subtree
+        entries = []
+        self._collect(node, entries)
+        entries.sort()
+        return [phrase for _, phrase in entries[:max_results]]
+
+    def _collect(self, node, entries):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.is_end_of_word and node.phrase:
+                entries.append((-node.weight, node.phrase))
+            stack.extend(node.children.values())
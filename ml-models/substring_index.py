@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Character n-gram index for substring lookups over a small sorted string list
+(the category suggestion bank). Every 1-, 2- and 3-gram of the lowercased
+strings gets a sorted posting list of string ids; a query is answered by
+intersecting the posting lists of its n-grams, rarest first, and verifying the
+candidates in id order. Ids follow sorted string order, so matches come out
+already sorted and only the first `limit` of them are materialized.
+"""
+
+from typing import List
+
+import numpy as np
+
+NGRAM_SIZE = 3
+
+
+def _ngrams(text: str, n: int) -> set:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SubstringIndex:
+    """Case-insensitive substring search over a fixed list of strings."""
+
+    def __init__(self, strings: List[str]):
+        self.strings = sorted(strings)
+        self.lowered = [s.lower() for s in self.strings]
+
+        postings = {}
+        for string_id, text in enumerate(self.lowered):
+            for n in range(1, NGRAM_SIZE + 1):
+                for gram in _ngrams(text, n):
+                    postings.setdefault(gram, []).append(string_id)
+        # Ids were appended in increasing order, so every list is already sorted
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def search(self, query: str, limit: int = 6) -> List[str]:
+        """
+        First `limit` strings (in sorted order) containing query, case-insensitively.
+
+        Args:
+            query: Substring to look for (lowercased here)
+            limit: Number of matches to return
+
+        Returns:
+            Matching strings, sorted
+        """
+        query = query.lower()
+        if not query:
+            return self.strings[:limit]
+
+        grams = _ngrams(query, min(len(query), NGRAM_SIZE))
+        lists = []
+        for gram in grams:
+            ids = self.postings.get(gram)
+            if ids is None:
+                return []
+            lists.append(ids)
+        lists.sort(key=len)
+
+        candidates = lists[0]
+        for ids in lists[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if not len(candidates):
+                return []
+
+        # n-gram hits are necessary but not sufficient for longer queries
+        matches = []
+        for string_id in candidates.tolist():
+            if len(query) <= NGRAM_SIZE or query in self.lowered[string_id]:
+                matches.append(self.strings[string_id])
+                if len(matches) >= limit:
+                    break
+        return matches
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Symmetric-delete index for edit-distance candidate lookup (the SymSpell approach).
+Every vocabulary word is indexed under all strings obtained by deleting up to
+max_distance characters from its prefix. A misspelled word generates its own
+deletes and the words sharing any of them are the only ones whose Levenshtein
+distance has to be computed, instead of scanning the whole vocabulary.
+
+The index is stored as sorted NumPy arrays (delete keys plus CSR postings) so it
+can be embedded in the spell artifact (see to_arrays) and looked up with one
+vectorized searchsorted.
+"""
+
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import Levenshtein
+
+DEFAULT_MAX_DISTANCE = 2
+DEFAULT_PREFIX_LENGTH = 7
+
+
+def vocabulary_hash(vocabulary: Iterable[str]) -> str:
+    """Order-independent hash of a vocabulary, used to detect stale saved indexes."""
+    digest = hashlib.sha1()
+    for word in sorted(vocabulary):
+        digest.update(word.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()[:16]
+
+
+def generate_deletes(word: str, max_distance: int, prefix_length: int) -> Set[str]:
+    """The word's prefix and every string reachable from it by up to max_distance deletions."""
+    key = word[:prefix_length]
+    deletes = {key}
+    frontier = {key}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        next_frontier -= deletes
+        deletes |= next_frontier
+        frontier = next_frontier
+    return deletes
+
+
+class SymmetricDeleteIndex:
+    """Delete-key -> word postings over a fixed vocabulary."""
+
+    def __init__(self,
+                 words: np.ndarray,
+                 keys: np.ndarray,
+                 offsets: np.ndarray,
+                 postings: np.ndarray,
+                 max_distance: int = DEFAULT_MAX_DISTANCE,
+                 prefix_length: int = DEFAULT_PREFIX_LENGTH):
+        self.words = words
+        self.keys = keys
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.postings = np.asarray(postings, dtype=np.int32)
+        self.max_distance = int(max_distance)
+        self.prefix_length = int(prefix_length)
+        self._word_list = words.tolist()
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def nbytes(self) -> int:
+        return self.words.nbytes + self.keys.nbytes + self.offsets.nbytes + self.postings.nbytes
+
+    @classmethod
+    def build(cls, vocabulary: Iterable[str],
+              max_distance: int = DEFAULT_MAX_DISTANCE,
+              prefix_length: int = DEFAULT_PREFIX_LENGTH) -> "SymmetricDeleteIndex":
+        """Index every vocabulary word under its prefix deletes."""
+        words = sorted(set(vocabulary))
+        postings_by_key = {}
+        for word_id, word in enumerate(words):
+            for delete in generate_deletes(word, max_distance, prefix_length):
+                postings_by_key.setdefault(delete, []).append(word_id)
+
+        keys = sorted(postings_by_key)
+        counts = [len(postings_by_key[k]) for k in keys]
+        offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]).astype(np.int64)
+        postings = np.fromiter((i for k in keys for i in postings_by_key[k]), dtype=np.int32,
+                               count=int(offsets[-1]))
+        return cls(np.array(words, dtype=str),
+                   np.array(keys, dtype=f"<U{max(prefix_length, 1)}"),
+                   offsets, postings, max_distance, prefix_length)
+
+    def to_arrays(self, prefix: str = "") -> Dict[str, np.ndarray]:
+        """Index arrays keyed by name, for embedding in an .npz archive."""
+        return {
+            f"{prefix}words": self.words,
+            f"{prefix}keys": self.keys,
+            f"{prefix}offsets": self.offsets,
+            f"{prefix}postings": self.postings,
+            f"{prefix}params": np.array([self.max_distance, self.prefix_length], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, data, prefix: str = "") -> "SymmetricDeleteIndex":
+        """Rebuild an index from arrays written by to_arrays."""
+        max_distance, prefix_length = (int(v) for v in data[f"{prefix}params"])
+        return cls(data[f"{prefix}words"], data[f"{prefix}keys"], data[f"{prefix}offsets"],
+                   data[f"{prefix}postings"], max_distance, prefix_length)
+
+    def lookup(self, word: str) -> List[str]:
+        """Vocabulary words sharing at least one delete with the given word (unverified)."""
+        deletes = np.array(list(generate_deletes(word, self.max_distance, self.prefix_length)),
+                           dtype=self.keys.dtype)
+        positions = np.searchsorted(self.keys, deletes)
+        found = positions < len(self.keys)
+        positions = positions[found]
+        positions = positions[self.keys[positions] == deletes[found]]
+        if len(positions) == 0:
+            return []
+
+        word_ids = np.unique(np.concatenate(
+            [self.postings[self.offsets[p]:self.offsets[p + 1]] for p in positions]))
+        return [self._word_list[i] for i in word_ids]
+
+    def candidates(self, word: str, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """(vocabulary word, Levenshtein distance) pairs within max_distance of word."""
+        max_distance = self.max_distance if max_distance is None else max_distance
+        if max_distance > self.max_distance:
+            raise ValueError(f"index was built for max_distance={self.max_distance}")
+
+        matches = []
+        for candidate in self.lookup(word):
+            if abs(len(candidate) - len(word)) > max_distance:
+                continue
+            distance = Levenshtein.distance(word, candidate)
+            if distance <= max_distance:
+                matches.append((candidate, distance))
+        return matches
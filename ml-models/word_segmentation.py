@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Word segmentation for run-together queries ("bluetoothheadphones", "menstshirt").
+A Viterbi pass over the characters picks the split into vocabulary words with the
+highest total log-probability under the catalog word frequencies. Candidate words
+starting at each position are found by walking a character trie over the
+vocabulary, so a token of length n costs O(n * max word length).
+"""
+
+import math
+from typing import Dict, List, Optional
+
+from lru_cache import LRUCache
+
+SEGMENT_CACHE_SIZE = 8192
+MIN_PIECE_LENGTH = 2
+
+# Trie key holding a word's log-probability at the node where it ends
+_END = ""
+
+
+class WordSegmenter:
+    """Unigram Viterbi word-break over a frequency-weighted vocabulary trie."""
+
+    def __init__(self, frequencies: Dict[str, int],
+                 min_piece_length: int = MIN_PIECE_LENGTH,
+                 cache_size: int = SEGMENT_CACHE_SIZE):
+        """
+        Build the vocabulary trie.
+
+        Args:
+            frequencies: Word -> count (catalog word frequencies)
+            min_piece_length: Shortest word a token may be split into
+            cache_size: Number of memoized segmentations
+        """
+        self.min_piece_length = min_piece_length
+        self.root = {}
+        self.max_word_length = 0
+        self.cache = LRUCache(cache_size)
+
+        words = {w: f for w, f in frequencies.items() if len(w) >= min_piece_length and f > 0}
+        total = sum(words.values())
+        for word, count in words.items():
+            node = self.root
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[_END] = math.log(count / total)
+            self.max_word_length = max(self.max_word_length, len(word))
+
+    def segment(self, text: str) -> Optional[List[str]]:
+        """
+        Most probable split of text into vocabulary words.
+
+        Returns:
+            List of words (a single word if text is itself in the vocabulary),
+            or None if text can't be fully covered by vocabulary words
+        """
+        cached = self.cache.get(text, _END)
+        if cached is not _END:
+            return cached
+        pieces = self._viterbi(text)
+        self.cache.put(text, pieces)
+        return pieces
+
+    def _viterbi(self, text: str) -> Optional[List[str]]:
+        n = len(text)
+        if n == 0:
+            return None
+
+        # best[i]: log-probability of the best segmentation of text[:i]; back[i]: start of its last word
+        best = [-math.inf] * (n + 1)
+        back = [-1] * (n + 1)
+        best[0] = 0.0
+        for start in range(n):
+            if best[start] == -math.inf:
+                continue
+            node = self.root
+            for end in range(start, min(n, start + self.max_word_length)):
+                node = node.get(text[end])
+                if node is None:
+                    break
+                log_prob = node.get(_END)
+                if log_prob is not None and best[start] + log_prob > best[end + 1]:
+                    best[end + 1] = best[start] + log_prob
+                    back[end + 1] = start
+
+        if best[n] == -math.inf:
+            return None
+        pieces = []
+        end = n
+        while end > 0:
+            start = back[end]
+            pieces.append(text[start:end])
+            end = start
+        pieces.reverse()
+        return pieces